@@ -0,0 +1,41 @@
+# Build members.bin, the kiosk's member allowlist, on a desktop computer
+#
+# Usage: python build_allowlist.py members.txt [members.bin]
+#
+# The input has one tag per line as the 10 hex digits the RDM6300 reports
+# (as printed by the kiosk's "Tag read" debug message). Blank lines and
+# anything after a '#' are ignored. Copy the output to the Pico next to
+# vote5final.py; without it every fob is accepted.
+
+import sys
+from storage import parse_tag, format_tag, write_member_list
+
+def read_tags(path):
+    """Tag integers listed in a text file"""
+    tags = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            text = line.split('#', 1)[0].strip()
+            if not text:
+                continue
+            try:
+                tag = parse_tag(text)
+            except ValueError:
+                raise SystemExit(f"{path}:{line_no}: not a hex tag ID: {text!r}")
+            if tag >> 40:
+                raise SystemExit(f"{path}:{line_no}: tag ID longer than 10 hex digits: {text!r}")
+            tags.append(tag)
+    return tags
+
+def main(argv):
+    if len(argv) not in (2, 3):
+        raise SystemExit("usage: python build_allowlist.py members.txt [members.bin]")
+    out_path = argv[2] if len(argv) == 3 else "members.bin"
+    tags = read_tags(argv[1])
+    write_member_list(out_path, tags)
+    print(f"Wrote {len(set(tags))} members to {out_path}")
+    if tags:
+        print(f"First tag: {format_tag(min(tags))}, last tag: {format_tag(max(tags))}")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,99 @@
+# Convert the kiosk's vote data between votes.bin and JSON on a desktop computer
+#
+# Usage: python convert_votes.py to-json [directory]
+#        python convert_votes.py to-bin [directory]
+#
+# to-json reads votes.bin, replays votes.log on top of it the way the kiosk
+# does at boot, adds the ballots/ directory and writes votes.json,
+# completed_judges.json and in_progress_votes.json, the files older versions
+# of the kiosk used. to-bin does the reverse, putting in-progress ballots in
+# votes.bin; the kiosk moves them into ballots/ when it next boots. As the
+# JSON already includes votes.log, to-bin starts a new, empty log to go with
+# the new votes.bin. The directory defaults to the current one.
+
+import json
+import os
+import sys
+from storage import VoteSnapshot, VoteLog, BallotStore, LOG_SELECT, parse_tag, format_tag
+
+UNVOTED = 0xFF
+
+def _replay_log(snapshot, path):
+    """Apply the submissions in votes.log to the snapshot, leaving the log as it is"""
+    ballots = {}  # tag -> {category: team} for ballots logged but not yet submitted
+    def apply(kind, tag, category, team):
+        if kind == LOG_SELECT:
+            if category < len(snapshot.categories) and team < len(snapshot.teams):
+                ballots.setdefault(tag, {})[category] = team
+            return
+        for category, team in ballots.pop(tag, {}).items():
+            snapshot.tallies[category * len(snapshot.teams) + team] += 1
+        snapshot.completed.add(tag)
+    VoteLog(path).replay(apply, snapshot.generation, readonly=True)
+    for tag, ballot in ballots.items():
+        for category, team in ballot.items():
+            snapshot.add_ballot(tag, category, team)
+
+def to_json(directory):
+    snapshot = VoteSnapshot.load(os.path.join(directory, 'votes.bin'))
+    _replay_log(snapshot, os.path.join(directory, 'votes.log'))
+    votes, completed, in_progress = snapshot.to_dicts()
+    # Ballot files use the same category and team indices as the snapshot;
+    # the kiosk may not have removed a submitted judge's file yet
+    ballots = os.path.join(directory, 'ballots')
+    if os.path.isdir(ballots):
+        for tag, ballot in BallotStore(ballots):
+            if tag in snapshot.completed:
+                continue
+            for category, team in enumerate(ballot):
+                if team != UNVOTED:
+                    in_progress.setdefault(tag, {})[snapshot.categories[category]] = snapshot.teams[team]
+    with open(os.path.join(directory, 'votes.json'), 'w') as f:
+        json.dump(votes, f, indent=2)
+    with open(os.path.join(directory, 'completed_judges.json'), 'w') as f:
+        json.dump([format_tag(tag) for tag in completed], f, indent=2)
+    with open(os.path.join(directory, 'in_progress_votes.json'), 'w') as f:
+        json.dump({format_tag(tag): ballot for tag, ballot in in_progress.items()}, f, indent=2)
+    print(f"Wrote JSON for {len(completed)} completed and {len(in_progress)} in-progress judges")
+
+def _load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+def to_bin(directory):
+    votes = _load_json(os.path.join(directory, 'votes.json'), {})
+    completed = [parse_tag(tag_id) for tag_id in
+                 _load_json(os.path.join(directory, 'completed_judges.json'), [])]
+    in_progress = {parse_tag(k): v for k, v in
+                   _load_json(os.path.join(directory, 'in_progress_votes.json'), {}).items()}
+    snapshot = VoteSnapshot.from_dicts(votes, completed, in_progress)
+    # The kiosk discards a log from another generation, so the new snapshot
+    # moves past the current log's and the log is restarted to match
+    log = VoteLog(os.path.join(directory, 'votes.log'))
+    generation = log.generation()
+    if generation is None:
+        try:
+            generation = VoteSnapshot.load(os.path.join(directory, 'votes.bin')).generation
+        except (OSError, ValueError):
+            generation = 0
+    snapshot.generation = (generation + 1) & 0xFF
+    snapshot.save(os.path.join(directory, 'votes.bin'))
+    log.reset(snapshot.generation)
+    log.close()
+    print(f"Wrote votes.bin with {len(snapshot.categories)} categories, {len(snapshot.teams)} teams "
+          f"and {len(snapshot.completed)} completed judges")
+
+def main(argv):
+    if len(argv) not in (2, 3) or argv[1] not in ('to-json', 'to-bin'):
+        raise SystemExit("usage: python convert_votes.py to-json|to-bin [directory]")
+    directory = argv[2] if len(argv) == 3 else '.'
+    if argv[1] == 'to-json':
+        to_json(directory)
+    else:
+        to_bin(directory)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,89 @@
+# Event configuration for the voting kiosk
+# The categories, teams and screen text of an event come from event.json
+# instead of code, so a new event only needs a new file. The file is streamed
+# through JSONReader and compiled once at boot into index-based tables.
+#
+# event.json layout:
+#   {
+#     "title": "PS1 Project Voting",
+#     "submit_option": "SUBMIT VOTES",
+#     "categories": ["Best Trophy", ...],
+#     "teams": [{"name": "VibeBox", "blurb": "NFC Fashion\nAmbient Space"}, ...]
+#   }
+# A team may also be given as just its name. Unknown keys are ignored.
+
+from jsonstream import JSONReader
+
+MAX_CATEGORIES = 255  # Category indices are stored in a byte
+MAX_TEAMS = 254       # Team indices are stored in a byte, and 0xFF marks an unvoted category
+
+class Event:
+    """An event's names and text, compiled for lookups by index
+
+    categories and teams are the names in menu order; ballots, tallies and
+    the vote log refer to them by position. category_index and team_index
+    map a name back to its position, and blurbs holds each team's short
+    description in team order, with \\n line breaks.
+    """
+    def __init__(self, categories, teams, blurbs=None, title="Project Voting", submit_option="SUBMIT VOTES"):
+        self.categories = list(categories)
+        self.teams = list(teams)
+        self.blurbs = list(blurbs) if blurbs is not None else [""] * len(self.teams)
+        self.title = title
+        self.submit_option = submit_option
+        if not 0 < len(self.categories) <= MAX_CATEGORIES:
+            raise ValueError("need 1 to %d categories" % MAX_CATEGORIES)
+        if not 0 < len(self.teams) <= MAX_TEAMS:
+            raise ValueError("need 1 to %d teams" % MAX_TEAMS)
+        if len(self.blurbs) != len(self.teams):
+            raise ValueError("need one blurb per team")
+        self.category_index = _index(self.categories, "category")
+        self.team_index = _index(self.teams, "team")
+        if submit_option in self.category_index:
+            raise ValueError("submit option shares a category's name")
+
+    @classmethod
+    def load(cls, path):
+        """Read an event file; raises OSError or ValueError"""
+        categories = []
+        teams = []
+        blurbs = []
+        settings = {}
+        with open(path, 'rb') as f:
+            reader = JSONReader(f)
+            for key in reader.iter_object():
+                if key == 'categories':
+                    for _ in reader.iter_array():
+                        categories.append(_string(reader.read_value(), "category"))
+                elif key == 'teams':
+                    # One team at a time, so only its own entry is ever built
+                    for _ in reader.iter_array():
+                        team = reader.read_value()
+                        if isinstance(team, dict):
+                            teams.append(_string(team.get('name'), "team name"))
+                            blurb = team.get('blurb', "")
+                            if not isinstance(blurb, str):
+                                raise ValueError("team blurb must be a string")
+                            blurbs.append(blurb)
+                        else:
+                            teams.append(_string(team, "team name"))
+                            blurbs.append("")
+                elif key in ('title', 'submit_option'):
+                    settings[key] = _string(reader.read_value(), key)
+                else:
+                    reader.skip_value()
+        return cls(categories, teams, blurbs, **settings)
+
+def _string(value, what):
+    if not isinstance(value, str) or not value:
+        raise ValueError("%s must be a non-empty string" % what)
+    return value
+
+def _index(names, what):
+    """Map each name to its position, rejecting duplicates"""
+    index = {}
+    for i, name in enumerate(names):
+        if name in index:
+            raise ValueError("duplicate %s: %s" % (what, name))
+        index[name] = i
+    return index
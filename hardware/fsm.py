@@ -0,0 +1,102 @@
+# Table-driven state machine for the voting kiosk
+# States, events and transitions are plain data and events arrive through a
+# preallocated queue.
+
+# Posted by StateMachine.tick() when a timed state runs out
+EV_TIMEOUT = -1
+
+class EventQueue:
+    """Fixed-size FIFO ring buffer of (event, arg) pairs
+
+    put() only stores into preallocated slots, so it is safe to call from an
+    interrupt handler. There must be a single consumer calling get().
+    """
+    def __init__(self, size=16):
+        self.size = size
+        self.events = [0] * size
+        self.args = [None] * size
+        self.head = 0  # Next slot to read
+        self.tail = 0  # Next slot to write
+
+    def __len__(self):
+        return (self.tail - self.head) % self.size
+
+    def put(self, event, arg=None):
+        """Queue an event; returns False (dropping it) if the queue is full"""
+        tail = self.tail
+        nxt = (tail + 1) % self.size
+        if nxt == self.head:
+            return False
+        self.events[tail] = event
+        self.args[tail] = arg
+        self.tail = nxt
+        return True
+
+    def get(self):
+        """Remove and return the oldest (event, arg) pair, or None if empty"""
+        head = self.head
+        if head == self.tail:
+            return None
+        event = self.events[head]
+        arg = self.args[head]
+        self.args[head] = None
+        self.head = (head + 1) % self.size
+        return event, arg
+
+class StateMachine:
+    """Dispatches events through a transition table
+
+    transitions maps state -> {event: action}. An action is either the next
+    state, or a handler called as handler(context, arg) that returns the next
+    state (None to stay put). Events with no entry for the current state are
+    ignored. timeouts maps state -> ms; entering such a state arms a timer
+    that posts EV_TIMEOUT once tick() has accounted for that much time.
+    """
+    def __init__(self, transitions, initial, context=None, timeouts=None, queue_size=16):
+        self.transitions = transitions
+        self.timeouts = timeouts or {}
+        self.context = context
+        self.queue = EventQueue(queue_size)
+        self.state = initial
+        self.remaining = None
+        self._enter(initial)
+
+    def _enter(self, state):
+        self.state = state
+        self.remaining = self.timeouts.get(state)
+
+    def post(self, event, arg=None):
+        """Queue an event for the next run(); returns False if the queue is full"""
+        return self.queue.put(event, arg)
+
+    def dispatch(self, event, arg=None):
+        """Handle one event immediately; returns True if the current state handled it"""
+        action = self.transitions[self.state].get(event)
+        if action is None:
+            return False
+        if isinstance(action, int):
+            target = action
+        else:
+            target = action(self.context, arg)
+        if target is not None:
+            self._enter(target)
+        return True
+
+    def run(self):
+        """Dispatch every queued event; returns how many were handled"""
+        handled = 0
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return handled
+            if self.dispatch(item[0], item[1]):
+                handled += 1
+
+    def tick(self, elapsed_ms):
+        """Advance the current state's timer, posting EV_TIMEOUT when it expires"""
+        if self.remaining is None:
+            return
+        self.remaining -= elapsed_ms
+        if self.remaining <= 0:
+            self.remaining = None
+            self.post(EV_TIMEOUT)
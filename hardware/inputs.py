@@ -0,0 +1,170 @@
+# Input devices for the voting kiosk
+# Interrupt handlers here only record into preallocated buffers; the main
+# loop drains them, so no rendering or allocation ever happens in IRQ context.
+
+from machine import Pin, disable_irq, enable_irq
+from array import array
+import time
+
+from fsm import EventQueue
+
+# Quadrature transitions indexed by (previous AB << 2) | current AB.
+# Clockwise runs 11 -> 10 -> 00 -> 01 -> 11. Unchanged states and jumps where
+# both channels flip at once (contact bounce or a missed edge) count as 0.
+_QUADRATURE = array('b', (0, 1, -1, 0, -1, 0, 0, 1, 1, 0, 0, -1, 0, -1, 1, 0))
+
+# Button event kinds
+BUTTON_PRESS = 1
+BUTTON_RELEASE = 2
+BUTTON_LONG_PRESS = 3
+
+# (max ms since the previous detent, detents counted) from fastest to slowest
+DEFAULT_ACCEL_CURVE = ((25, 8), (50, 4), (100, 2))
+
+class RotaryEncoder:
+    """Quadrature rotary encoder with debouncing and velocity acceleration
+
+    Both channels interrupt on both edges and are decoded through a Gray-code
+    state table, so bounce on one channel cancels itself out instead of
+    producing phantom steps. A detent is reported once a full cycle of
+    steps_per_detent quarter steps has accumulated in one direction.
+
+    Detents and their timestamps go into a preallocated EventQueue from a
+    hard IRQ; read() sums them in the main loop and applies the acceleration
+    curve, scaled to the length of the list being navigated.
+    """
+    def __init__(self, pin_a, pin_b, steps_per_detent=4, ring_size=32,
+                 accel_curve=DEFAULT_ACCEL_CURVE, accel_divisor=8):
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.steps_per_detent = steps_per_detent
+        self.accel_curve = accel_curve
+        self.accel_divisor = accel_divisor
+
+        self.state = (pin_a.value() << 1) | pin_b.value()
+        self.quarter_steps = 0
+
+        # Detents (+1/-1) paired with the low 16 bits of ticks_ms
+        self.ring = EventQueue(ring_size)
+        self.last_time = 0
+        self.last_delta = 0
+
+        trigger = Pin.IRQ_RISING | Pin.IRQ_FALLING
+        pin_a.irq(trigger=trigger, handler=self._edge, hard=True)
+        pin_b.irq(trigger=trigger, handler=self._edge, hard=True)
+
+    def _edge(self, pin):
+        """Decode one channel edge (hard IRQ, allocation-free)"""
+        state = (self.pin_a.value() << 1) | self.pin_b.value()
+        step = _QUADRATURE[(self.state << 2) | state]
+        self.state = state
+        if step == 0:
+            return
+        quarter_steps = self.quarter_steps + step
+        if quarter_steps >= self.steps_per_detent:
+            self.quarter_steps = 0
+            self._put(1)
+        elif quarter_steps <= -self.steps_per_detent:
+            self.quarter_steps = 0
+            self._put(-1)
+        else:
+            self.quarter_steps = quarter_steps
+
+    def _put(self, delta):
+        """Record a detent; if the ring is full it is folded into the newest slot"""
+        ring = self.ring
+        if not ring.put(delta, time.ticks_ms() & 0xFFFF):
+            ring.events[(ring.tail - 1) % ring.size] += delta
+
+    def read(self, span=0):
+        """Return the net detents since the last read, with acceleration applied
+
+        span is the number of items being navigated. Each detent may count for
+        at most span // accel_divisor items, so short lists are never skipped
+        through; pass 0 for no acceleration.
+        """
+        max_gain = span // self.accel_divisor
+        total = 0
+        while True:
+            item = self.ring.get()
+            if item is None:
+                return total
+            delta, stamp = item
+            interval = (stamp - self.last_time) & 0xFFFF
+            self.last_time = stamp
+
+            gain = 1
+            # Reversing direction always starts again at single steps
+            if max_gain > 1 and (delta > 0) == (self.last_delta > 0):
+                for max_ms, curve_gain in self.accel_curve:
+                    if interval <= max_ms:
+                        gain = min(curve_gain, max_gain)
+                        break
+            self.last_delta = delta
+            total += delta * gain
+
+class ButtonEvents(EventQueue):
+    """EventQueue of timestamped button events
+
+    Buttons put() into it from hard IRQs (or from poll() with interrupts
+    disabled); the main loop is the only consumer and calls get(). The kind
+    and timestamp are packed into one small int so put() never allocates.
+    """
+    def put(self, button, kind, now):
+        """Record an event; returns False (dropping it) if the queue is full"""
+        return EventQueue.put(self, button, ((now & 0xFFFF) << 2) | kind)
+
+    def get(self):
+        """Remove the oldest event as (button, kind, ticks_ms & 0xFFFF), or None"""
+        item = EventQueue.get(self)
+        if item is None:
+            return None
+        return item[0], item[1] & 3, item[1] >> 2
+
+class Button:
+    """Active-low push button reporting debounced press/release/long-press events
+
+    Edges are timestamped in a hard IRQ and ignored for debounce_ms after an
+    accepted change. poll() must be called regularly from the main loop: it
+    reports long presses and catches a release that landed inside the
+    debounce window. Events are tagged with ident.
+    """
+    def __init__(self, pin, ident, events, debounce_ms=20, long_press_ms=800):
+        self.pin = pin
+        self.ident = ident
+        self.events = events
+        self.debounce_ms = debounce_ms
+        self.long_press_ms = long_press_ms
+        self.pressed = not pin.value()
+        self.changed_at = time.ticks_ms()
+        self.long_sent = False
+        pin.irq(trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING, handler=self._edge, hard=True)
+
+    def _edge(self, pin):
+        """Accept an edge outside the debounce window (hard IRQ, allocation-free)"""
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.changed_at) < self.debounce_ms:
+            return
+        pressed = not pin.value()
+        if pressed != self.pressed:
+            self._change(pressed, now)
+
+    def _change(self, pressed, now):
+        self.pressed = pressed
+        self.changed_at = now
+        self.long_sent = False
+        self.events.put(self.ident, BUTTON_PRESS if pressed else BUTTON_RELEASE, now)
+
+    def poll(self):
+        """Report long presses and resync state missed during debouncing"""
+        state = disable_irq()
+        now = time.ticks_ms()
+        held = time.ticks_diff(now, self.changed_at)
+        pressed = not self.pin.value()
+        if pressed != self.pressed:
+            if held >= self.debounce_ms:
+                self._change(pressed, now)
+        elif pressed and not self.long_sent and held >= self.long_press_ms:
+            self.long_sent = True
+            self.events.put(self.ident, BUTTON_LONG_PRESS, now)
+        enable_irq(state)
@@ -0,0 +1,171 @@
+# Pull-style JSON reader for the voting kiosk
+# Reads a file through a small fixed buffer and hands values to the caller
+# one at a time, so a large document never has to fit in RAM as text or as
+# an object graph.
+#
+# Usage: walk the document the way it is nested. iter_object() yields each
+# key and iter_array() each element, and the caller must consume the value
+# (read_value(), a nested iter_*() or skip_value()) before asking for the
+# next one. Malformed input raises ValueError, like json.load().
+
+_WHITESPACE = tuple(b' \t\r\n')
+_ESCAPES = {
+    ord('"'): '"', ord('\\'): '\\', ord('/'): '/', ord('b'): '\b',
+    ord('f'): '\f', ord('n'): '\n', ord('r'): '\r', ord('t'): '\t',
+}
+_NUMBER_CHARS = tuple(b'0123456789+-.eE')
+
+class JSONReader:
+    """Tokenizes a binary file of JSON through a chunk_size byte buffer"""
+    def __init__(self, f, chunk_size=256):
+        self.f = f
+        self.buf = bytearray(chunk_size)
+        self.end = 0  # Valid bytes in buf
+        self.pos = 0  # Next byte to read from buf
+        self.offset = 0  # File offset of buf[0], for error messages
+
+    def _peek(self):
+        """The next byte without consuming it, or -1 at end of file"""
+        if self.pos >= self.end:
+            self.offset += self.end
+            self.end = self.f.readinto(self.buf) or 0
+            self.pos = 0
+            if not self.end:
+                return -1
+        return self.buf[self.pos]
+
+    def _next(self):
+        c = self._peek()
+        self.pos += 1
+        return c
+
+    def _error(self, what):
+        raise ValueError("bad JSON at byte %d: %s" % (self.offset + self.pos, what))
+
+    def _skip_whitespace(self):
+        """Skip whitespace and return the next byte without consuming it"""
+        while True:
+            c = self._peek()
+            if c < 0 or c not in _WHITESPACE:
+                return c
+            self.pos += 1
+
+    def _expect(self, char):
+        if self._skip_whitespace() != ord(char):
+            self._error("expected " + char)
+        self.pos += 1
+
+    def _string(self):
+        """Read a string, starting at its opening quote"""
+        self._expect('"')
+        raw = bytearray()
+        while True:
+            c = self._next()
+            if c < 0:
+                self._error("unterminated string")
+            if c == ord('"'):
+                return str(raw, 'utf-8')
+            if c != ord('\\'):
+                raw.append(c)
+                continue
+            c = self._next()
+            if c == ord('u'):
+                code = 0
+                for _ in range(4):
+                    digit = self._next()
+                    try:
+                        code = (code << 4) | int(chr(digit), 16)
+                    except ValueError:
+                        self._error("bad \\u escape")
+                raw.extend(chr(code).encode())
+            elif c in _ESCAPES:
+                raw.extend(_ESCAPES[c].encode())
+            else:
+                self._error("bad escape")
+
+    def _number(self):
+        text = bytearray()
+        while True:
+            c = self._peek()
+            if c < 0 or c not in _NUMBER_CHARS:
+                break
+            text.append(c)
+            self.pos += 1
+        text = str(text, 'utf-8')
+        try:
+            if '.' in text or 'e' in text or 'E' in text:
+                return float(text)
+            return int(text)
+        except ValueError:
+            self._error("bad number")
+
+    def _literal(self, word, value):
+        for char in word:
+            if self._next() != ord(char):
+                self._error("bad literal")
+        return value
+
+    def iter_object(self):
+        """Yield the keys of the object that comes next"""
+        self._expect('{')
+        if self._skip_whitespace() == ord('}'):
+            self.pos += 1
+            return
+        while True:
+            key = self._string()
+            self._expect(':')
+            yield key
+            c = self._skip_whitespace()
+            self.pos += 1
+            if c == ord('}'):
+                return
+            if c != ord(','):
+                self._error("expected , or }")
+
+    def iter_array(self):
+        """Yield the index of each element of the array that comes next"""
+        self._expect('[')
+        if self._skip_whitespace() == ord(']'):
+            self.pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            c = self._skip_whitespace()
+            self.pos += 1
+            if c == ord(']'):
+                return
+            if c != ord(','):
+                self._error("expected , or ]")
+
+    def read_value(self):
+        """Read the next value, building nested objects and arrays in full"""
+        c = self._skip_whitespace()
+        if c == ord('"'):
+            return self._string()
+        if c == ord('{'):
+            return {key: self.read_value() for key in self.iter_object()}
+        if c == ord('['):
+            return [self.read_value() for _ in self.iter_array()]
+        if c == ord('t'):
+            return self._literal('true', True)
+        if c == ord('f'):
+            return self._literal('false', False)
+        if c == ord('n'):
+            return self._literal('null', None)
+        if c >= 0 and c in _NUMBER_CHARS:
+            return self._number()
+        self._error("expected a value")
+
+    def skip_value(self):
+        """Consume the next value without building it"""
+        c = self._skip_whitespace()
+        if c == ord('{'):
+            for _ in self.iter_object():
+                self.skip_value()
+        elif c == ord('['):
+            for _ in self.iter_array():
+                self.skip_value()
+        else:
+            self.read_value()
@@ -0,0 +1,65 @@
+# Text layout for the voting kiosk displays
+# Wraps and truncates labels once at startup so the screen renderers only
+# look up ready-to-draw line tuples instead of splitting strings every frame.
+
+FONT_WIDTH = 8       # framebuf's built-in font is 8x8
+DISPLAY_WIDTH = 128  # Both OLEDs are 128 pixels wide
+
+def columns(x, display_width=DISPLAY_WIDTH):
+    """Number of characters that fit on a line starting at pixel x"""
+    return (display_width - x) // FONT_WIDTH
+
+def wrap(text, width, max_lines=2):
+    """Greedy word wrap into at most max_lines lines of at most width chars
+
+    Words longer than a line are split across lines; anything past the last
+    line is dropped. Always returns at least one (possibly empty) line.
+    """
+    lines = []
+    line = ""
+    for word in text.split():
+        while len(word) > width:
+            if line:
+                lines.append(line)
+                line = ""
+            lines.append(word[:width])
+            word = word[width:]
+        if not line:
+            line = word
+        elif len(line) + 1 + len(word) <= width:
+            line += " " + word
+        else:
+            lines.append(line)
+            line = word
+    if line:
+        lines.append(line)
+    return tuple(lines[:max_lines]) or ("",)
+
+def wrap_paragraphs(text, width, max_lines=3):
+    """Like wrap(), but keeping the line breaks already in text"""
+    lines = []
+    for paragraph in text.split('\n'):
+        lines.extend(wrap(paragraph, width, max_lines))
+    return tuple(lines[:max_lines])
+
+class TextLayout:
+    """Precomputed wrapped and truncated lines for a fixed list of labels
+
+    Every width a renderer asks for must be listed up front: those used with
+    lines() in wrap_widths and those used with fit() in fit_widths.
+    """
+    def __init__(self, labels, wrap_widths=(), fit_widths=(), max_lines=2):
+        self.wrapped = {}
+        self.fitted = {}
+        for width in wrap_widths:
+            self.wrapped[width] = tuple(wrap(label, width, max_lines) for label in labels)
+        for width in fit_widths:
+            self.fitted[width] = tuple(label[:width] for label in labels)
+
+    def lines(self, i, width):
+        """Wrapped lines of label i for a line width of width characters"""
+        return self.wrapped[width][i]
+
+    def fit(self, i, width):
+        """Label i truncated to a single line of width characters"""
+        return self.fitted[width][i]
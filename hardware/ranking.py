@@ -0,0 +1,97 @@
+# Ranked vote results for the voting kiosk
+# Keeps every category's teams sorted by votes as ballots come in, so the
+# results screen reads rankings instead of sorting on every redraw.
+
+class RankedResults:
+    """Per-category team rankings over a categories x teams tally matrix
+
+    tallies is an array of vote counts, one row of len(teams) per category,
+    and is updated through vote(). Within a category, teams are ordered by
+    votes, most first, with ties in team order. Ranks follow the usual
+    competition style: tied teams share a rank and the next rank skips
+    (1, 1, 3). A vote moves its team up past the teams it overtakes, so it
+    costs at most one pass over the category; reads are lookups.
+    """
+    def __init__(self, tallies, n_categories, n_teams):
+        if n_teams > 255:
+            raise ValueError("at most 255 teams")
+        self.tallies = tallies
+        self.n_categories = n_categories
+        self.n_teams = n_teams
+        size = n_categories * n_teams
+        self.order = bytearray(size)     # Team at each position, per category
+        self.position = bytearray(size)  # Position of each team, per category
+        self.ranks = bytearray(size)     # Rank (1-based) at each position, per category
+        self.rebuild()
+
+    def rebuild(self):
+        """Sort every category from scratch (after the tallies were loaded)"""
+        n = self.n_teams
+        tallies = self.tallies
+        for category in range(self.n_categories):
+            row = category * n
+            order = sorted(range(n), key=lambda team: (-tallies[row + team], team))
+            for pos, team in enumerate(order):
+                self.order[row + pos] = team
+                self.position[row + team] = pos
+            self._rerank(category, 0, n)
+
+    def _rerank(self, category, start, stop):
+        """Recompute the ranks from position start, at least up to stop - 1
+
+        Past stop it carries on only while ranks still change, which they
+        do down a run of teams tied with a changed one.
+        """
+        row = category * self.n_teams
+        for pos in range(start, self.n_teams):
+            if pos and self.tallies[row + self.order[row + pos]] == self.tallies[row + self.order[row + pos - 1]]:
+                rank = self.ranks[row + pos - 1]
+            else:
+                rank = pos + 1
+            if pos >= stop and rank == self.ranks[row + pos]:
+                break
+            self.ranks[row + pos] = rank
+
+    def vote(self, category, team):
+        """Count one vote for team in category and move it up the ranking"""
+        row = category * self.n_teams
+        tallies = self.tallies
+        order = self.order
+        tallies[row + team] += 1
+        votes = tallies[row + team]
+        start = self.position[row + team]
+        pos = start
+        while pos:
+            ahead = order[row + pos - 1]
+            if tallies[row + ahead] > votes or (tallies[row + ahead] == votes and ahead < team):
+                break
+            order[row + pos] = ahead
+            self.position[row + ahead] = pos
+            pos -= 1
+        order[row + pos] = team
+        self.position[row + team] = pos
+        # Ranks change from the new position down to the entry just below
+        # the old one, whose neighbour above is now different
+        self._rerank(category, pos, min(start + 2, self.n_teams))
+
+    def team_at(self, category, pos):
+        """Team index at position pos (0 is the leader)"""
+        return self.order[category * self.n_teams + pos]
+
+    def rank_at(self, category, pos):
+        """Competition rank of the team at position pos"""
+        return self.ranks[category * self.n_teams + pos]
+
+    def votes_at(self, category, pos):
+        """Votes of the team at position pos"""
+        row = category * self.n_teams
+        return self.tallies[row + self.order[row + pos]]
+
+    def pages(self, per_page):
+        """Number of pages of per_page rows a category's ranking fills"""
+        return max(1, (self.n_teams + per_page - 1) // per_page)
+
+    def page(self, page, per_page):
+        """Positions shown on a page of per_page rows; page 0 is the top-k view"""
+        start = page * per_page
+        return range(start, min(start + per_page, self.n_teams))
@@ -0,0 +1,100 @@
+# Streaming frame parser for the RDM6300 125 kHz RFID reader
+#
+# Frame layout (14 bytes):
+#   0x02 | 10 ASCII hex chars of tag data | 2 ASCII hex chars of checksum | 0x03
+# The checksum is the XOR of the five data bytes.
+
+STX = 0x02
+ETX = 0x03
+FRAME_LEN = 14
+
+def _hex_value(c):
+    """Value of an ASCII hex digit, or -1 if c is not one"""
+    if 0x30 <= c <= 0x39:
+        return c - 0x30
+    c |= 0x20  # Fold to lower case
+    if 0x61 <= c <= 0x66:
+        return c - 0x57
+    return -1
+
+class RDM6300Parser:
+    """Incremental RDM6300 frame parser
+
+    Bytes can be fed in arbitrary chunks: a frame split across two UART reads
+    is completed on the next call. Any unexpected byte drops the partial
+    frame, and a start marker always restarts one, so the parser
+    resynchronises on the next 0x02. Frames with a bad checksum are counted in
+    errors and discarded.
+
+    If on_tag_id is given it is called with the tag as soon as its ten hex
+    digits are in, before the checksum arrives, so lookups can start early.
+    The tag is unverified at that point; only feed()'s return value is.
+    """
+    def __init__(self, on_tag_id=None):
+        self.frame = bytearray(FRAME_LEN)
+        self.pos = 0  # Bytes of the current frame collected; 0 means hunting for STX
+        self.errors = 0
+        self.on_tag_id = on_tag_id
+
+    def reset(self):
+        """Drop any partially received frame"""
+        self.pos = 0
+
+    def feed(self, data, n=None):
+        """Consume the first n bytes of data (all of it by default)
+
+        Returns the tag of the last valid frame completed, as a 40-bit
+        integer, or None.
+        """
+        if n is None:
+            n = len(data)
+        frame = self.frame
+        tag = None
+        for i in range(n):
+            b = data[i]
+            pos = self.pos
+            if b == STX:
+                frame[0] = b
+                self.pos = 1
+            elif pos == 0:
+                continue
+            elif pos < FRAME_LEN - 1:
+                if _hex_value(b) < 0:
+                    self.errors += 1
+                    self.pos = 0
+                else:
+                    frame[pos] = b
+                    self.pos = pos + 1
+                    if pos == 10 and self.on_tag_id is not None:
+                        self.on_tag_id(self._tag())
+            else:
+                self.pos = 0
+                if b == ETX:
+                    parsed = self._decode()
+                    if parsed is None:
+                        self.errors += 1
+                    else:
+                        tag = parsed
+                else:
+                    self.errors += 1
+        return tag
+
+    def _byte(self, i):
+        """Value of the hex digit pair starting at frame[i]"""
+        return (_hex_value(self.frame[i]) << 4) | _hex_value(self.frame[i + 1])
+
+    def _tag(self):
+        """The tag from the collected tag digits"""
+        tag = 0
+        for i in range(1, 11, 2):
+            tag = (tag << 8) | self._byte(i)
+        return tag
+
+    def _decode(self):
+        """Return the tag in the collected frame, or None if its checksum fails"""
+        checksum = 0
+        for i in range(1, 11, 2):
+            checksum ^= self._byte(i)
+        if checksum != self._byte(11):
+            return None
+        return self._tag()
@@ -0,0 +1,648 @@
+# On-flash data formats for the voting kiosk
+# Shared by vote5final.py on the Pico and by host-side tools, so everything
+# here sticks to what both MicroPython and desktop Python provide.
+
+import os
+import struct
+from array import array
+
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None
+
+def _replace(tmp, path):
+    """Rename tmp over path atomically; os.rename() does so on littlefs, but
+    desktop Python on Windows needs os.replace()"""
+    getattr(os, 'replace', os.rename)(tmp, path)
+
+# RFID tags are 40-bit integers (the 10 hex digits the RDM6300 sends),
+# stored on flash as 5 big-endian bytes
+TAG_BYTES = 5
+
+def parse_tag(text):
+    """Tag integer from its 10 hex digit form, as used by the old JSON files"""
+    return int(text, 16)
+
+def format_tag(tag):
+    """10 hex digit form of a tag integer, for display and JSON"""
+    return "%010X" % tag
+
+def _split_tag(tag):
+    """A tag as two 20-bit halves, which stay small ints on MicroPython"""
+    return tag >> 20, tag & 0xFFFFF
+
+def _record_halves(d, off):
+    """The 5-byte tag record at d[off] as (high 20 bits, low 20 bits)"""
+    hi = (d[off] << 12) | (d[off + 1] << 4) | (d[off + 2] >> 4)
+    lo = ((d[off + 2] & 0x0F) << 16) | (d[off + 3] << 8) | d[off + 4]
+    return hi, lo
+
+def _search_records(tag, count, halves):
+    """Binary search count sorted tag records, where halves(i) returns record
+    i as _record_halves() does; returns (index, found) for where tag is or
+    would be inserted"""
+    hi, lo = _split_tag(tag)
+    low = 0
+    high = count
+    while low < high:
+        mid = (low + high) // 2
+        mid_hi, mid_lo = halves(mid)
+        if mid_hi == hi and mid_lo == lo:
+            return mid, True
+        if mid_hi < hi or (mid_hi == hi and mid_lo < lo):
+            low = mid + 1
+        else:
+            high = mid
+    return low, False
+
+def _pack_tag(d, off, tag):
+    """Store tag as a 5-byte record at d[off], without allocating"""
+    hi, lo = _split_tag(tag)
+    d[off] = hi >> 12
+    d[off + 1] = (hi >> 4) & 0xFF
+    d[off + 2] = ((hi & 0x0F) << 4) | (lo >> 16)
+    d[off + 3] = (lo >> 8) & 0xFF
+    d[off + 4] = lo & 0xFF
+
+class TagIndex:
+    """Sorted set of tags packed as 5-byte records in a single bytearray
+
+    Membership is a binary search that compares records as pairs of 20-bit
+    small ints, so lookups never build per-entry objects. Snapshots store the
+    same packed array, so loading one is a single readinto() with no parsing.
+    """
+    def __init__(self, data=None):
+        self.data = bytearray(data) if data else bytearray()
+
+    def __len__(self):
+        return len(self.data) // TAG_BYTES
+
+    def _halves(self, i):
+        return _record_halves(self.data, i * TAG_BYTES)
+
+    def __contains__(self, tag):
+        if tag is None:
+            return False
+        return _search_records(tag, len(self), self._halves)[1]
+
+    def add(self, tag):
+        """Insert tag, keeping the records sorted; returns False if already present"""
+        i, found = _search_records(tag, len(self), self._halves)
+        if found:
+            return False
+        off = i * TAG_BYTES
+        self.data[off:off] = tag.to_bytes(TAG_BYTES, 'big')
+        return True
+
+    def append(self, tag):
+        """Add tag at the end, ignoring order; call sort() once all are in"""
+        off = len(self.data)
+        self.data.extend(bytes(TAG_BYTES))
+        _pack_tag(self.data, off, tag)
+
+    def _less(self, i, j):
+        return self._halves(i) < self._halves(j)
+
+    def _swap(self, i, j):
+        d = self.data
+        i *= TAG_BYTES
+        j *= TAG_BYTES
+        for k in range(TAG_BYTES):
+            d[i + k], d[j + k] = d[j + k], d[i + k]
+
+    def _sift_down(self, root, end):
+        while True:
+            child = 2 * root + 1
+            if child >= end:
+                return
+            if child + 1 < end and self._less(child, child + 1):
+                child += 1
+            if not self._less(root, child):
+                return
+            self._swap(root, child)
+            root = child
+
+    def sort(self):
+        """Sort appended records in place (heapsort) and drop duplicates"""
+        n = len(self)
+        for root in range(n // 2 - 1, -1, -1):
+            self._sift_down(root, n)
+        for end in range(n - 1, 0, -1):
+            self._swap(0, end)
+            self._sift_down(0, end)
+        d = self.data
+        kept = min(n, 1)
+        for i in range(1, n):
+            if self._halves(i) != self._halves(kept - 1):
+                if kept != i:
+                    d[kept * TAG_BYTES:(kept + 1) * TAG_BYTES] = d[i * TAG_BYTES:(i + 1) * TAG_BYTES]
+                kept += 1
+        d[kept * TAG_BYTES:] = b''
+
+    def __iter__(self):
+        for i in range(len(self)):
+            off = i * TAG_BYTES
+            yield int.from_bytes(self.data[off:off + TAG_BYTES], 'big')
+
+# Member allowlist file (members.bin), built on a host by build_allowlist.py:
+#   header: magic, version, Bloom hash count, reserved, Bloom filter bits, member count
+#   Bloom filter bit array, (bits + 7) // 8 bytes
+#   member tags, sorted, TAG_BYTES each
+MEMBERS_MAGIC = b'CJML'
+MEMBERS_VERSION = 1
+_MEMBERS_HEADER = '<4sBBHII'
+_MEMBERS_HEADER_SIZE = struct.calcsize(_MEMBERS_HEADER)
+_MAX_BLOOM_BITS = 1 << 20  # Bloom hashes are 20 bits wide
+
+def _mix20(x):
+    """Scramble a 20-bit value; every intermediate stays below 2**30"""
+    x = ((x ^ (x >> 11)) * 0x2E5) & 0xFFFFF
+    x = ((x ^ (x >> 9)) * 0x3A7) & 0xFFFFF
+    return x ^ (x >> 10)
+
+def _bloom_seeds(tag):
+    """The two base hashes (h1, h2) used to derive a tag's Bloom filter bits"""
+    hi, lo = _split_tag(tag)
+    h1 = _mix20(hi ^ _mix20(lo))
+    h2 = _mix20(lo ^ _mix20(hi ^ 0x5A5A5)) | 1
+    return h1, h2
+
+def write_member_list(path, tags, bits_per_member=10):
+    """Write a members.bin allowlist for the given tag integers (host side)"""
+    tags = sorted(set(tags))
+    bits = min(max(64, len(tags) * bits_per_member), _MAX_BLOOM_BITS)
+    hashes = max(1, round(bits_per_member * 0.693))
+    bloom = bytearray((bits + 7) // 8)
+    for tag in tags:
+        h1, h2 = _bloom_seeds(tag)
+        for i in range(hashes):
+            bit = (h1 + i * h2) % bits
+            bloom[bit >> 3] |= 1 << (bit & 7)
+    with open(path, 'wb') as f:
+        f.write(struct.pack(_MEMBERS_HEADER, MEMBERS_MAGIC, MEMBERS_VERSION, hashes, 0, bits, len(tags)))
+        f.write(bloom)
+        for tag in tags:
+            f.write(tag.to_bytes(TAG_BYTES, 'big'))
+
+class MemberList:
+    """Read-only member allowlist queried in place on flash
+
+    Only the header and a few bytes of scratch space live in RAM. A lookup
+    first probes the Bloom filter, which rejects almost every unknown tag
+    after a handful of single-byte reads, then confirms with a binary search
+    over the sorted tag records.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        header = self.file.read(_MEMBERS_HEADER_SIZE)
+        if len(header) != _MEMBERS_HEADER_SIZE:
+            raise ValueError("truncated member list")
+        magic, version, self.hashes, _, self.bits, self.count = struct.unpack(_MEMBERS_HEADER, header)
+        if magic != MEMBERS_MAGIC or version != MEMBERS_VERSION:
+            raise ValueError("not a version %d member list" % MEMBERS_VERSION)
+        self.bloom_offset = _MEMBERS_HEADER_SIZE
+        self.tags_offset = self.bloom_offset + (self.bits + 7) // 8
+        self.byte = bytearray(1)
+        self.record = bytearray(TAG_BYTES)
+
+    def __len__(self):
+        return self.count
+
+    def might_contain(self, tag):
+        """Bloom filter check: False means tag is definitely not a member"""
+        h1, h2 = _bloom_seeds(tag)
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            self.file.seek(self.bloom_offset + (bit >> 3))
+            self.file.readinto(self.byte)
+            if not (self.byte[0] >> (bit & 7)) & 1:
+                return False
+        return True
+
+    def __contains__(self, tag):
+        if tag is None or not self.might_contain(tag):
+            return False
+        return _search_records(tag, self.count, self._halves)[1]
+
+    def _halves(self, i):
+        self.file.seek(self.tags_offset + i * TAG_BYTES)
+        self.file.readinto(self.record)
+        return _record_halves(self.record, 0)
+
+    def close(self):
+        self.file.close()
+
+if crc32 is None:
+    # Ports built without binascii.crc32 fall back to a table-driven CRC-32
+    _CRC_TABLE = array('I', bytes(1024))
+    for _i in range(256):
+        _c = _i
+        for _ in range(8):
+            _c = (_c >> 1) ^ 0xEDB88320 if _c & 1 else _c >> 1
+        _CRC_TABLE[_i] = _c
+
+    def crc32(data, crc=0):
+        crc ^= 0xFFFFFFFF
+        for b in data:
+            crc = _CRC_TABLE[(crc ^ b) & 0xFF] ^ (crc >> 8)
+        return crc ^ 0xFFFFFFFF
+
+# Vote log (votes.log): append-only ballot changes, one record per event:
+#   record type u8 | payload | CRC-32 of type and payload, u32 little-endian
+# Categories and teams are stored as indices into the event's lists. A log
+# starts with a LOG_BEGIN record naming the snapshot generation it follows.
+LOG_SELECT = 1  # payload: tag, category index u8, team index u8
+LOG_SUBMIT = 2  # payload: tag
+LOG_BEGIN = 3   # payload: snapshot generation u8
+_LOG_PAYLOAD = {LOG_SELECT: TAG_BYTES + 2, LOG_SUBMIT: TAG_BYTES, LOG_BEGIN: 1}
+_LOG_RECORD_MAX = 1 + TAG_BYTES + 2 + 4
+
+class VoteLog:
+    """Append-only, CRC-framed log of ballot events
+
+    Each event costs one small append whatever the amount of data already
+    recorded. replay() applies every intact record; a record torn by a power
+    cut fails its CRC, and it and anything after it are cut off so later
+    appends stay readable.
+
+    Once a snapshot holding everything logged has been written, reset()
+    starts an empty log for the snapshot's generation. A log left over from
+    an older generation has already been folded into the snapshot, so
+    replay() discards it instead of applying it twice.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.record = bytearray(_LOG_RECORD_MAX)
+        self.view = memoryview(self.record)
+        self.file = None
+        self.size = 0  # Bytes of intact records in the log
+
+    def replay(self, apply, generation=0, readonly=False):
+        """Call apply(kind, tag, category, team) for every intact record
+
+        category and team are None for LOG_SUBMIT. generation is that of the
+        snapshot being replayed onto. Opens the log for appending afterwards,
+        unless readonly, which leaves the file untouched; returns the number
+        of records applied.
+        """
+        applied = 0
+        end = 0  # Offset just past the last intact record
+        torn = False
+        stale = False
+        try:
+            with open(self.path, 'rb') as f:
+                while True:
+                    head = f.read(1)
+                    if not head:
+                        break
+                    size = _LOG_PAYLOAD.get(head[0])
+                    if size is None:
+                        torn = True
+                        break
+                    self.record[0] = head[0]
+                    body = self.view[1:1 + size + 4]
+                    if f.readinto(body) != size + 4 or not self._check(size):
+                        torn = True
+                        break
+                    first = end == 0
+                    end += 1 + size + 4
+                    if first and (head[0] != LOG_BEGIN or self.record[1] != generation):
+                        stale = True
+                        break
+                    if head[0] == LOG_BEGIN:
+                        continue
+                    tag = int.from_bytes(self.record[1:1 + TAG_BYTES], 'big')
+                    if head[0] == LOG_SELECT:
+                        apply(LOG_SELECT, tag, self.record[1 + TAG_BYTES], self.record[2 + TAG_BYTES])
+                    else:
+                        apply(LOG_SUBMIT, tag, None, None)
+                    applied += 1
+        except OSError:
+            pass  # No log yet
+        if readonly:
+            return 0 if stale else applied
+        if stale:
+            print("Vote log already in the snapshot, starting a new one")
+        if stale or end == 0:
+            self.reset(generation)
+            return 0
+        if torn:
+            print(f"Vote log damaged after {applied} records, truncating")
+            self._truncate(end)
+        self.file = open(self.path, 'ab')
+        self.size = end
+        return applied
+
+    def generation(self):
+        """Generation the log follows, or None if there is no intact log"""
+        try:
+            with open(self.path, 'rb') as f:
+                head = f.read(1)
+                size = _LOG_PAYLOAD.get(head[0]) if head else None
+                if size is None:
+                    return None
+                self.record[0] = head[0]
+                if f.readinto(self.view[1:1 + size + 4]) != size + 4 or not self._check(size):
+                    return None
+        except OSError:
+            return None
+        return self.record[1] if head[0] == LOG_BEGIN else None
+
+    def _check(self, size):
+        """Does the record in the buffer, with a payload of size bytes, pass its CRC?"""
+        expected = struct.unpack_from('<I', self.record, 1 + size)[0]
+        return crc32(self.view[:1 + size]) & 0xFFFFFFFF == expected
+
+    def _truncate(self, end):
+        """Keep only the first end bytes of the log"""
+        tmp = self.path + '.tmp'
+        with open(self.path, 'rb') as src, open(tmp, 'wb') as dst:
+            while end > 0:
+                chunk = src.read(min(end, 256))
+                dst.write(chunk)
+                end -= len(chunk)
+        _replace(tmp, self.path)
+
+    def _frame(self, kind, size):
+        """Frame the record whose payload is already in the buffer"""
+        self.record[0] = kind
+        struct.pack_into('<I', self.record, 1 + size, crc32(self.view[:1 + size]) & 0xFFFFFFFF)
+        return self.view[:1 + size + 4]
+
+    def _append(self, kind, size):
+        self.file.write(self._frame(kind, size))
+        self.size += 1 + size + 4
+
+    def append_select(self, tag, category, team):
+        """Log that judge tag voted for team in category"""
+        _pack_tag(self.record, 1, tag)
+        self.record[1 + TAG_BYTES] = category
+        self.record[2 + TAG_BYTES] = team
+        self._append(LOG_SELECT, TAG_BYTES + 2)
+
+    def append_submit(self, tag):
+        """Log that judge tag submitted their ballot"""
+        _pack_tag(self.record, 1, tag)
+        self._append(LOG_SUBMIT, TAG_BYTES)
+
+    def flush(self):
+        """Commit appended records to flash"""
+        self.file.flush()
+
+    def reset(self, generation):
+        """Atomically replace the log with an empty one following generation"""
+        if self.file is not None:
+            self.file.close()
+        tmp = self.path + '.tmp'
+        self.record[1] = generation
+        with open(tmp, 'wb') as f:
+            f.write(self._frame(LOG_BEGIN, 1))
+        _replace(tmp, self.path)
+        self.file = open(self.path, 'ab')
+        self.size = 1 + 1 + 4
+
+    def close(self):
+        """Close the log file, for tools that are done with it"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class BallotStore:
+    """In-progress ballots kept as one small file per judge
+
+    A ballot is the judge's team index per category, stored as
+    root/XX/TTTTTTTTTT, where TTTTTTTTTT is the tag in hex and XX its low
+    byte. The filesystem's directory lookup is the index, split over up to
+    256 shard directories so none grows large. A ballot is read only when its
+    judge taps in and rewritten on its own, so neither costs more as other
+    judges leave ballots unfinished. littlefs commits a rewritten file
+    atomically when it is closed.
+    """
+    def __init__(self, root='ballots'):
+        self.root = root
+        self._mkdir(root)
+
+    @staticmethod
+    def _mkdir(path):
+        try:
+            os.mkdir(path)
+        except OSError:
+            pass  # Already exists
+
+    def _shard(self, tag):
+        return "%s/%02X" % (self.root, tag & 0xFF)
+
+    def load(self, tag, ballot):
+        """Read judge tag's ballot into the bytearray ballot; returns False if there is none
+
+        A stored ballot shorter than ballot (from before categories were
+        added) leaves the remaining slots untouched.
+        """
+        try:
+            with open("%s/%s" % (self._shard(tag), format_tag(tag)), 'rb') as f:
+                f.readinto(ballot)
+            return True
+        except OSError:
+            return False
+
+    def save(self, tag, ballot):
+        """Write judge tag's ballot, replacing any previous version"""
+        shard = self._shard(tag)
+        path = "%s/%s" % (shard, format_tag(tag))
+        try:
+            f = open(path, 'wb')
+        except OSError:
+            self._mkdir(shard)
+            f = open(path, 'wb')
+        with f:
+            f.write(ballot)
+
+    def remove(self, tag):
+        """Delete judge tag's ballot, if there is one"""
+        try:
+            os.remove("%s/%s" % (self._shard(tag), format_tag(tag)))
+        except OSError:
+            pass
+
+    def __iter__(self):
+        """Yield (tag, ballot bytes) for every stored ballot"""
+        for shard in sorted(os.listdir(self.root)):
+            for name in sorted(os.listdir("%s/%s" % (self.root, shard))):
+                with open("%s/%s/%s" % (self.root, shard, name), 'rb') as f:
+                    yield parse_tag(name), f.read()
+
+    def replace_with(self, root):
+        """Replace every ballot with those of the store at root, if there is one
+
+        The current ballots are deleted before root is renamed into place, so
+        after a power cut part way root is still there and calling this again
+        finishes the job.
+        """
+        try:
+            os.stat(root)
+        except OSError:
+            return
+        try:
+            for shard in os.listdir(self.root):
+                path = "%s/%s" % (self.root, shard)
+                for name in os.listdir(path):
+                    os.remove("%s/%s" % (path, name))
+                os.rmdir(path)
+            os.rmdir(self.root)
+        except OSError:
+            pass  # Already deleted
+        os.rename(root, self.root)
+
+# Vote snapshot file (votes.bin), all integers little-endian:
+#   header: magic, version, category count, team count, generation u8,
+#           completed judge count u32, in-progress record count u32
+#   dictionary: each category name, then each team name, as u8 length + UTF-8
+#   tallies: u16 per (category, team), category-major
+#   completed judges: sorted tags, TAG_BYTES each
+#   in-progress records: u8 category index, u8 team index, tag
+VOTES_MAGIC = b'CJVB'
+VOTES_VERSION = 1
+_VOTES_HEADER = '<4sBBBBII'
+_VOTES_HEADER_SIZE = struct.calcsize(_VOTES_HEADER)
+BALLOT_BYTES = 2 + TAG_BYTES
+
+def _read_names(f, count):
+    names = []
+    for _ in range(count):
+        size = f.read(1)[0]
+        names.append(f.read(size).decode())
+    return names
+
+class VoteSnapshot:
+    """Tallies, completed judges and in-progress ballots in packed form
+
+    Categories and teams are referred to by index into the snapshot's own
+    name lists, so a name is stored once however many votes it has. Every
+    section loads with a single readinto() into an array or bytearray.
+
+    generation counts (modulo 256) the snapshots written on the kiosk and
+    ties the snapshot to the vote log that continues it.
+    """
+    def __init__(self, categories, teams):
+        if len(categories) > 255 or len(teams) > 255:
+            raise ValueError("at most 255 categories and 255 teams")
+        self.categories = list(categories)
+        self.teams = list(teams)
+        self.tallies = array('H', bytes(2 * len(self.categories) * len(self.teams)))
+        self.completed = TagIndex()
+        self.ballots = bytearray()
+        self.generation = 0
+
+    def tally(self, category, team):
+        """Votes for team index in category index"""
+        return self.tallies[category * len(self.teams) + team]
+
+    def add_ballot(self, tag, category, team):
+        """Append an in-progress vote by category and team index"""
+        off = len(self.ballots)
+        self.ballots.extend(bytes(BALLOT_BYTES))
+        self.ballots[off] = category
+        self.ballots[off + 1] = team
+        _pack_tag(self.ballots, off + 2, tag)
+
+    def iter_ballots(self):
+        """Yield (tag, category, team) for every in-progress vote"""
+        d = self.ballots
+        for off in range(0, len(d), BALLOT_BYTES):
+            yield int.from_bytes(d[off + 2:off + BALLOT_BYTES], 'big'), d[off], d[off + 1]
+
+    @classmethod
+    def from_dicts(cls, votes, completed, in_progress, categories=(), teams=()):
+        """Build a snapshot from the kiosk's dict form
+
+        votes maps category -> team -> count, completed is an iterable of tags
+        and in_progress maps tag -> category -> team. Names missing from
+        categories or teams are appended to them in the order they appear.
+        """
+        categories = list(categories)
+        teams = list(teams)
+        for category, counts in votes.items():
+            if category not in categories:
+                categories.append(category)
+            for team in counts:
+                if team not in teams:
+                    teams.append(team)
+        for ballot in in_progress.values():
+            for category, team in ballot.items():
+                if category not in categories:
+                    categories.append(category)
+                if team not in teams:
+                    teams.append(team)
+        snapshot = cls(categories, teams)
+        category_index = {name: i for i, name in enumerate(categories)}
+        team_index = {name: i for i, name in enumerate(teams)}
+        for category, counts in votes.items():
+            row = category_index[category] * len(teams)
+            for team, count in counts.items():
+                snapshot.tallies[row + team_index[team]] = count
+        if isinstance(completed, TagIndex):
+            snapshot.completed = TagIndex(completed.data)
+        else:
+            for tag in completed:
+                snapshot.completed.append(tag)
+            snapshot.completed.sort()
+        for tag, ballot in in_progress.items():
+            for category, team in ballot.items():
+                snapshot.add_ballot(tag, category_index[category], team_index[team])
+        return snapshot
+
+    def to_dicts(self):
+        """Return (votes, completed tags, in_progress) in the dict form from_dicts() takes"""
+        votes = {}
+        for c, category in enumerate(self.categories):
+            votes[category] = {}
+            for t, team in enumerate(self.teams):
+                count = self.tally(c, t)
+                if count:
+                    votes[category][team] = count
+        in_progress = {}
+        for tag, c, t in self.iter_ballots():
+            in_progress.setdefault(tag, {})[self.categories[c]] = self.teams[t]
+        return votes, list(self.completed), in_progress
+
+    @classmethod
+    def load(cls, path):
+        """Read a snapshot saved with save(); raises OSError if the file is missing"""
+        with open(path, 'rb') as f:
+            header = f.read(_VOTES_HEADER_SIZE)
+            if len(header) != _VOTES_HEADER_SIZE:
+                raise ValueError("truncated votes file")
+            magic, version, n_categories, n_teams, generation, n_completed, n_ballots = struct.unpack(_VOTES_HEADER, header)
+            if magic != VOTES_MAGIC or version != VOTES_VERSION:
+                raise ValueError("not a version %d votes file" % VOTES_VERSION)
+            snapshot = cls(_read_names(f, n_categories), _read_names(f, n_teams))
+            snapshot.generation = generation
+            snapshot.completed.data = bytearray(n_completed * TAG_BYTES)
+            snapshot.ballots = bytearray(n_ballots * BALLOT_BYTES)
+            sections = ((snapshot.tallies, 2 * len(snapshot.tallies)),
+                        (snapshot.completed.data, len(snapshot.completed.data)),
+                        (snapshot.ballots, len(snapshot.ballots)))
+            for section, size in sections:
+                if size and f.readinto(section) != size:
+                    raise ValueError("truncated votes file")
+        return snapshot
+
+    def save(self, path):
+        """Write the snapshot to path, atomically replacing any existing file
+
+        The data goes to a temporary file renamed over path once complete, so
+        a power cut leaves either the old snapshot or the new one.
+        """
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(struct.pack(_VOTES_HEADER, VOTES_MAGIC, VOTES_VERSION, len(self.categories), len(self.teams), self.generation,
+                                len(self.completed), len(self.ballots) // BALLOT_BYTES))
+            for name in self.categories + self.teams:
+                encoded = name.encode()
+                f.write(bytes((len(encoded),)))
+                f.write(encoded)
+            f.write(self.tallies)
+            f.write(self.completed.data)
+            f.write(self.ballots)
+        _replace(tmp, path)
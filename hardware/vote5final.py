@@ -1,9 +1,21 @@
 # Vote 5, with "improved" UI/UX and voting progress saver, but bugs! 
 # Part 1: Imports and Initial Setup
-from machine import Pin, I2C, SPI, UART
+from machine import Pin, I2C, SPI, UART, disable_irq, enable_irq
 import framebuf
+import micropython
+from micropython import const
+import uasyncio as asyncio
 import time
-import json
+from array import array
+from collections import OrderedDict
+from layout import TextLayout, columns, wrap_paragraphs, FONT_WIDTH
+from fsm import StateMachine, EV_TIMEOUT
+from rfid import RDM6300Parser
+from jsonstream import JSONReader
+from event import Event
+from ranking import RankedResults
+from storage import MemberList, VoteLog, VoteSnapshot, BallotStore, LOG_SELECT, parse_tag, format_tag
+from inputs import RotaryEncoder, Button, ButtonEvents, BUTTON_PRESS
 
 # Hardware Pin Assignments
 # ======================
@@ -34,55 +46,44 @@ KEY_B = Pin(17, Pin.IN, Pin.PULL_UP)  # OLED Button B
 
 # System States
 # ============
-MODE_WAITING = "WAITING_FOR_RFID"
-MODE_JUDGE_MENU = "JUDGE_MENU"
-MODE_CATEGORY_SELECT = "CATEGORY_SELECT"
-MODE_VOTING = "VOTING"
-MODE_CONFIRM_SUBMIT = "CONFIRM_SUBMIT"
-MODE_RESULTS = "RESULTS"
-MODE_THANK_YOU = "THANK_YOU"
+MODE_WAITING = const(0)  # Waiting for an RFID tag
+MODE_JUDGE_MENU = const(1)
+MODE_CATEGORY_SELECT = const(2)
+MODE_VOTING = const(3)
+MODE_CONFIRM_SUBMIT = const(4)
+MODE_RESULTS = const(5)
+MODE_THANK_YOU = const(6)
+MODE_MISSING = const(7)  # Briefly listing categories still needing votes
+MODE_REJECTED = const(8)  # Briefly showing that a fob is not on the allowlist
 
-# Special category for final submission
-SUBMIT_OPTION = "SUBMIT VOTES"
+# Input Events (EV_TIMEOUT comes from fsm.py)
+# ============
+EV_TAG = const(1)     # arg: tag ID
+EV_KEY_A = const(2)
+EV_KEY_B = const(3)
+EV_ROTATE = const(4)  # arg: detents turned, positive is clockwise
+
+# How long timed screens stay up before moving on (ms)
+MESSAGE_TIMEOUT = 2000
+
+# Ballot slot value for a category not voted in yet
+UNVOTED = const(0xFF)
+
+# RAM set aside for cached rendered screens (each entry holds both
+# frame buffers: 1 KB for the 1.3" OLED plus 2 KB for the SH1107)
+FRAME_CACHE_BUDGET = 24 * 1024
+
+# Recently tapped judges whose lookups are kept in RAM
+JUDGE_CACHE_SIZE = 8
 
 # Voting System Data
 # ================
-TEAMS = ["VibeBox", "Harmony Hub", "Duncan Box"]
-CATEGORIES = [
-    "Best Trophy",
-    "Best Immersive",
-    "Most Improved",
-    "Best Engineering",
-    "Most Artistic"
-]
-
-# Team Information Dictionary
-TEAM_INFO = {
-    "VibeBox": {
-        "small": "NFC Fashion\nAmbient Space\nMusic Control",
-        "big": [
-            "Wearable NFC Tech",
-            "Interactive Fashion",
-            "Ambient Lighting"
-        ]
-    },
-    "Harmony Hub": {
-        "small": "AI Music\nReal-time Build\nCommunity Choice",
-        "big": [
-            "AI-Powered Music",
-            "Real-time Creation",
-            "Community Driven"
-        ]
-    },
-    "Duncan Box": {
-        "small": "Supply Chain\nSmart Container\nQR Tracking",
-        "big": [
-            "Smart Logistics",
-            "IoT Container",
-            "Real-time Tracking"
-        ]
-    }
-}
+# The event's categories, teams and title come from event.json; ballots,
+# tallies and the vote log refer to them by index
+EVENT = Event.load('event.json')
+TEAMS = EVENT.teams
+CATEGORIES = EVENT.categories
+SUBMIT_OPTION = EVENT.submit_option  # Menu entry after the last category
 
 # Welcome Screen ASCII Art
 WELCOME_ART = """
@@ -94,11 +95,93 @@ WELCOME_ART = """
        |___/
 """
 
+# Precomputed Text Layouts
+# ======================
+# Labels are wrapped/truncated once here; renderers only look lines up
+CATEGORY_LAYOUT = TextLayout(CATEGORIES + [SUBMIT_OPTION], wrap_widths=(columns(0), columns(5), columns(10)),
+                             fit_widths=(columns(10),))
+TEAM_LAYOUT = TextLayout(TEAMS, fit_widths=(columns(0), columns(10), 10, 8))
+TEAM_BLURBS = tuple(wrap_paragraphs(blurb, columns(0), 3) for blurb in EVENT.blurbs)  # In team order
+WELCOME_LINES = tuple(line[:columns(0)] for line in WELCOME_ART.strip().split('\n'))
+TITLE_LINE = EVENT.title[:columns(0)]
+TITLE_X = (columns(0) - len(TITLE_LINE)) * FONT_WIDTH // 2
+
+# Paging for lists that can outgrow a screen
+LAST_LINE_Y = 56  # Lowest text line on a 64 pixel high display
+# The vote summary has 4 lines per page; each category takes its wrapped name plus a team line
+SUMMARY_ROWS = 4 // (max(len(CATEGORY_LAYOUT.lines(i, columns(0))) for i in range(len(CATEGORIES))) + 1)
+SUMMARY_PAGES = (len(CATEGORIES) + SUMMARY_ROWS - 1) // SUMMARY_ROWS
+
+# Ballots are a team index per category; copy this for a new one
+BALLOT_TEMPLATE = bytes((UNVOTED,)) * len(CATEGORIES)
+
+# Display Controller Command Tables
+# ================================
+# Each table is sent as a single command stream by the driver's write_cmds()
+
+# SPI 1.3" OLED controller initialisation
+OLED_1INCH3_INIT = bytes((
+    0xAE,        # Display off
+    0x00,        # Set lower column start address
+    0x10,        # Set higher column start address
+    0x40,        # Set display start line
+    0xB0,        # Set page address
+    0x81, 0xFF,  # Set contrast control, max contrast
+    0xA1,        # Set segment remap (changed to A0 from A1)
+    0xA6,        # Normal display
+    0xA8, 0x3F,  # Select multiplex ratio, duty = 1/64
+    0xC0,        # Set COM output direction (changed to C0 from C8)
+    0xD3, 0x00,  # Set display offset, no offset
+    0xD5, 0x80,  # Set display clock, recommended value
+    0xD9, 0xF1,  # Set precharge period, recommended value
+    0xDA, 0x12,  # Set COM pins
+    0xDB, 0x40,  # Set VCOMH
+    0x8D, 0x14,  # Set charge pump
+    0xAF,        # Display on
+))
+
+# SH1107 initialisation
+SH1107_INIT = bytes((
+    0xAE,        # display off
+    0xDC, 0x00,  # set display start line
+    0x81, 0x7F,  # set contrast control
+    0xA0,        # segment remap (change to 0xA0 to flip horizontally)
+    0xA8, 0x7F,  # multiplex ratio
+    0xD3, 0x00,  # set display offset
+    0xD5, 0x51,  # set display clock
+    0xD9, 0x22,  # set pre-charge period
+    0xDB, 0x35,  # set vcomh
+    0xB0,        # set page address
+    0xDA, 0x12,  # com pins configuration
+    0xA4,        # display all points normal
+    0xA6,        # normal display
+    0xC0,        # Set COM scan direction (0xC0 for normal, 0xC8 for flip)
+    0xAF,        # display on
+))
+
 # Part 2: RFID and Display Classes
 
+@micropython.viper
+def bytes_differ(a, b, n: int) -> bool:
+    """Compare the first n bytes of two buffers without allocating"""
+    pa = ptr8(a)
+    pb = ptr8(b)
+    for i in range(n):
+        if pa[i] != pb[i]:
+            return True
+    return False
+
+@micropython.viper
+def copy_bytes(dst, src, n: int):
+    """Copy the first n bytes of src into dst without allocating"""
+    pd = ptr8(dst)
+    ps = ptr8(src)
+    for i in range(n):
+        pd[i] = ps[i]
+
 class RDM6300:
     """RFID Reader Class for RDM6300 module"""
-    def __init__(self, rx_pin=5):
+    def __init__(self, rx_pin=5, on_tag_id=None):
         self.uart = UART(1, 
             baudrate=9600,
             rx=Pin(rx_pin),
@@ -107,31 +190,26 @@ class RDM6300:
             stop=1,
             timeout=100
         )
+        self.parser = RDM6300Parser(on_tag_id)  # on_tag_id fires before the checksum
+        self.buf = bytearray(32)  # Reused for every UART read
         self.last_tag = None
         self.last_read_time = 0
         self.read_delay = 2000  # 2 second delay between same card reads
         
     def read_tag(self):
-        """Read RFID tag, includes debouncing and validation"""
-        if not self.uart.any():
-            return None
-            
-        data = self.uart.read()
-        if not data or len(data) < 14:
-            return None
-            
-        # Look for start and end markers in the data
+        """Read RFID tag as an integer, includes debouncing and validation"""
         tag = None
-        for i in range(len(data)):
-            if data[i] == 0x02 and i + 13 < len(data):  # Start marker
-                if data[i + 13] == 0x03:  # End marker
-                    try:
-                        tag = data[i+1:i+11].decode()  # Extract tag data
-                        break
-                    except:
-                        continue
-        
-        if not tag:
+        pending = self.uart.any()
+        while pending:
+            n = self.uart.readinto(self.buf, min(pending, len(self.buf)))
+            if not n:
+                break
+            parsed = self.parser.feed(self.buf, n)
+            if parsed is not None:
+                tag = parsed
+            pending -= n
+        
+        if tag is None:
             return None
             
         # Implement debouncing for repeated reads
@@ -149,12 +227,17 @@ class RDM6300:
         
     def flush(self):
         """Clear any pending data in the UART buffer"""
-        if self.uart.any():
-            self.uart.read()
+        while self.uart.any():
+            self.uart.readinto(self.buf)
+        self.parser.reset()
 
 class OLED_1inch3(framebuf.FrameBuffer):
-    """Driver for the 1.3 inch OLED display (SPI)"""
-    def __init__(self):
+    """Driver for the 1.3 inch OLED display (SPI)
+    
+    With double_buffer=True, drawing goes to the back buffer and show() sends
+    a separate front buffer that is only updated by swap().
+    """
+    def __init__(self, double_buffer=False):
         self.width = 128
         self.height = 64
         
@@ -175,259 +258,644 @@ class OLED_1inch3(framebuf.FrameBuffer):
                       mosi=Pin(MOSI),
                       miso=None)
         
-        # Initialize framebuffer
+        # Initialize framebuffer (the back buffer when double buffered)
         self.buffer = bytearray(self.height * self.width // 8)
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_HMSB)
+        self.front = bytearray(len(self.buffer)) if double_buffer else self.buffer
+        
+        # Copy of what was last sent to the panel, so show() can skip unchanged pages
+        self.shadow = bytearray(len(self.buffer))
+        self.full_refresh = True
+        
+        # Per-page views, so show() never allocates
+        buf_view = memoryview(self.front)
+        shadow_view = memoryview(self.shadow)
+        self._pages = [buf_view[p * 16:(p + 1) * 16] for p in range(8)]
+        self._shadow_pages = [shadow_view[p * 16:(p + 1) * 16] for p in range(8)]
+        # Page address, lower column, higher column for each page
+        self._page_cmds = [bytes((0xB0 + p, 0x00, 0x10)) for p in range(8)]
         self.init_display()
         
-    def write_cmd(self, cmd):
-        """Write a command to the display"""
+    def write_cmds(self, cmds):
+        """Write a sequence of command bytes in a single SPI transaction"""
         self.cs(1)
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
-        self.cs(1)
-
-    def write_data(self, buf):
-        """Write data to the display"""
-        self.cs(1)
-        self.dc(1)
-        self.cs(0)
-        if isinstance(buf, bytearray):
-            self.spi.write(buf)
-        else:
-            self.spi.write(bytearray([buf]))
+        self.spi.write(cmds)
         self.cs(1)
 
     def init_display(self):
         """Initialize the display with required commands"""
-        # Reset sequence
+        # Reset sequence: the controller needs a >=10us low pulse and is
+        # ready to accept commands a few microseconds after release
         self.rst(1)
-        time.sleep(0.01)
+        time.sleep_ms(1)
         self.rst(0)
-        time.sleep(0.1)
+        time.sleep_ms(1)
         self.rst(1)
-        time.sleep(0.1)
-        
-        self.write_cmd(0xAE)  # Display off
-        self.write_cmd(0x00)  # Set lower column start address
-        self.write_cmd(0x10)  # Set higher column start address
-        self.write_cmd(0x40)  # Set display start line
-        self.write_cmd(0xB0)  # Set page address
-        self.write_cmd(0x81)  # Set contrast control
-        self.write_cmd(0xFF)  # Max contrast
-        self.write_cmd(0xA1)  # Set segment remap (changed to A0 from A1)
-        self.write_cmd(0xA6)  # Normal display
-        self.write_cmd(0xA8)  # Select multiplex ratio
-        self.write_cmd(0x3F)  # Duty = 1/64
-        self.write_cmd(0xC0)  # Set COM output direction (changed to C0 from C8)
-        self.write_cmd(0xD3)  # Set display offset
-        self.write_cmd(0x00)  # No offset
-        self.write_cmd(0xD5)  # Set display clock
-        self.write_cmd(0x80)  # Recommended value
-        self.write_cmd(0xD9)  # Set precharge period
-        self.write_cmd(0xF1)  # Recommended value
-        self.write_cmd(0xDA)  # Set COM pins
-        self.write_cmd(0x12)
-        self.write_cmd(0xDB)  # Set VCOMH
-        self.write_cmd(0x40)
-        self.write_cmd(0x8D)  # Set charge pump
-        self.write_cmd(0x14)
-        self.write_cmd(0xAF)  # Display on
+        time.sleep_ms(1)
+        
+        self.write_cmds(OLED_1INCH3_INIT)
+        
+        # Panel RAM contents are unknown after a reset
+        self.full_refresh = True
 
-    def show(self):
-        """Update the display with the current buffer contents"""
+    def swap(self):
+        """Publish the back buffer as the frame show() sends next (with IRQs off)"""
+        if self.front is self.buffer:
+            return
+        state = disable_irq()
+        copy_bytes(self.front, self.buffer, len(self.buffer))
+        enable_irq(state)
+
+    def send_page(self, page, full=False):
+        """Send one page if it changed since it was last sent (or full is set); returns True if sent"""
+        data = self._pages[page]
+        shadow = self._shadow_pages[page]
+        if not full and not bytes_differ(data, shadow, 16):
+            return False
+        # Addressing and page data share one chip-select window
+        self.cs(1)
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(self._page_cmds[page])
+        self.dc(1)
+        self.spi.write(data)
+        self.cs(1)
+        copy_bytes(shadow, data, 16)
+        return True
+
+    def show(self, full=False):
+        """Update the display, sending only pages changed since the last show() unless full"""
+        full = full or self.full_refresh
+        self.full_refresh = False
+        for page in range(8):
+            self.send_page(page, full)
+
+    async def show_async(self, full=False):
+        """Like show(), but yields to other tasks after every page sent"""
+        full = full or self.full_refresh
+        self.full_refresh = False
         for page in range(8):
-            self.write_cmd(0xB0 + page)
-            self.write_cmd(0x00)
-            self.write_cmd(0x10)
-            self.write_data(self.buffer[page*16:(page+1)*16])
+            if self.send_page(page, full):
+                await asyncio.sleep_ms(0)
 
 class SH1107:
-    """Driver for the SH1107 OLED display (I2C)"""
-    def __init__(self, width=128, height=128):
+    """Driver for the SH1107 OLED display (I2C)
+    
+    With double_buffer=True, drawing goes to the back buffer and show() sends
+    a separate front buffer that is only updated by swap().
+    """
+    def __init__(self, width=128, height=128, double_buffer=False):
         self.width = width
         self.height = height
         self.pages = height // 8
         self.buffer = bytearray(self.pages * width)
         self.framebuf = framebuf.FrameBuffer(self.buffer, width, height, framebuf.MONO_VLSB)
+        self.front = bytearray(len(self.buffer)) if double_buffer else self.buffer
         self.addr = 0x3c  # Fixed I2C address for the display
+        
+        # Copy of what was last sent to the panel, so show() can skip unchanged pages
+        self.shadow = bytearray(len(self.buffer))
+        self.full_refresh = True
+        
+        # Per-page scatter vectors for writevto(). Each page header carries the
+        # addressing commands (Co=1 control bytes) followed by the 0x40 data
+        # control byte, so a page is one I2C transaction.
+        buf_view = memoryview(self.front)
+        shadow_view = memoryview(self.shadow)
+        self._pages = [
+            (bytes((0x80, 0xB0 + p, 0x80, 0x00, 0x80, 0x10, 0x40)),
+             buf_view[width * p:width * (p + 1)])
+            for p in range(self.pages)
+        ]
+        self._shadow_pages = [shadow_view[width * p:width * (p + 1)] for p in range(self.pages)]
         self.init_display()
         
-    def write_cmd(self, cmd):
-        """Write a command to the display"""
-        i2c.writeto(self.addr, bytes([0x00, cmd]))
+    def write_cmds(self, cmds):
+        """Write a sequence of command bytes in a single I2C transaction"""
+        i2c.writevto(self.addr, (b'\x00', cmds))
 
-    def write_data(self, buf):
-        """Write data to the display"""
-        i2c.writeto(self.addr, b'\x40' + buf)
-        
     def init_display(self):
         """Initialize the display with required commands"""
-        commands = [
-            0xAE,  # display off
-            0xDC, 0x00,  # set display start line
-            0x81, 0x7F,  # set contrast control
-            0xA0,  # segment remap (change to 0xA0 to flip horizontally)
-            0xA8, 0x7F,  # multiplex ratio
-            0xD3, 0x00,  # set display offset
-            0xD5, 0x51,  # set display clock
-            0xD9, 0x22,  # set pre-charge period
-            0xDB, 0x35,  # set vcomh
-            0xB0,  # set page address
-            0xDA, 0x12,  # com pins configuration
-            0xA4,  # display all points normal
-            0xA6,  # normal display
-            0xC0,  # Set COM scan direction (0xC0 for normal, 0xC8 for flip)
-            0xAF   # display on
-        ]
+        self.write_cmds(SH1107_INIT)
         
-        for cmd in commands:
-            self.write_cmd(cmd)
-            time.sleep(0.001)
+        # Panel RAM contents are unknown after init
+        self.full_refresh = True
 
-    def show(self):
-        """Update the display with the current buffer contents"""
+    def swap(self):
+        """Publish the back buffer as the frame show() sends next (with IRQs off)"""
+        if self.front is self.buffer:
+            return
+        state = disable_irq()
+        copy_bytes(self.front, self.buffer, len(self.buffer))
+        enable_irq(state)
+
+    def send_page(self, page, full=False):
+        """Send one page if it changed since it was last sent (or full is set); returns True if sent"""
+        vector = self._pages[page]
+        shadow = self._shadow_pages[page]
+        if not full and not bytes_differ(vector[1], shadow, self.width):
+            return False
+        i2c.writevto(self.addr, vector)
+        copy_bytes(shadow, vector[1], self.width)
+        return True
+
+    def show(self, full=False):
+        """Update the display, sending only pages changed since the last show() unless full"""
+        full = full or self.full_refresh
+        self.full_refresh = False
+        for page in range(self.pages):
+            self.send_page(page, full)
+
+    async def show_async(self, full=False):
+        """Like show(), but yields to other tasks after every page sent"""
+        full = full or self.full_refresh
+        self.full_refresh = False
         for page in range(self.pages):
-            self.write_cmd(0xB0 + page)
-            self.write_cmd(0x00)
-            self.write_cmd(0x10)
-            self.write_data(self.buffer[self.width * page:self.width * (page + 1)])
+            if self.send_page(page, full):
+                await asyncio.sleep_ms(0)
             
     def clear(self):
-        """Clear the display"""
+        """Clear the frame buffer; call show() once the new screen is drawn"""
         self.framebuf.fill(0)
-        self.show()
+
+class FrameCache:
+    """Bounded LRU cache of rendered frame buffers, keyed by UI state"""
+    def __init__(self, budget=FRAME_CACHE_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self.entries = OrderedDict()
+        self.spare = None  # Evicted buffers, reused by the next put()
+        
+    def get(self, key):
+        """Return the cached frames for key (marking them recently used), or None"""
+        frames = self.entries.pop(key, None)
+        if frames is not None:
+            self.entries[key] = frames
+        return frames
+    
+    def put(self, key, *buffers):
+        """Store copies of the given frame buffers under key, evicting old entries"""
+        size = sum(len(buf) for buf in buffers)
+        if size > self.budget:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.used -= sum(len(buf) for buf in old)
+            self.spare = old
+        while self.used + size > self.budget:
+            oldest = next(iter(self.entries))
+            self.spare = self.entries.pop(oldest)
+            self.used -= sum(len(buf) for buf in self.spare)
+        
+        # Recycle an evicted entry's buffers when possible to avoid heap churn
+        frames = self.spare
+        self.spare = None
+        if frames is None or len(frames) != len(buffers):
+            frames = tuple(bytearray(len(buf)) for buf in buffers)
+        for dst, src in zip(frames, buffers):
+            copy_bytes(dst, src, len(src))
+        self.entries[key] = frames
+        self.used += size
+        
+    def clear(self):
+        """Drop every cached screen"""
+        self.entries = OrderedDict()
+        self.used = 0
+        self.spare = None
+
+class JudgeCache:
+    """Small LRU cache of judge lookups: tag -> (allowed, ballot)"""
+    def __init__(self, size=JUDGE_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        
+    def get(self, tag):
+        """Return the cached lookup for tag (marking it recently used), or None"""
+        entry = self.entries.pop(tag, None)
+        if entry is not None:
+            self.entries[tag] = entry
+        return entry
+    
+    def put(self, tag, entry):
+        """Store a lookup, evicting the least recently used one if full"""
+        self.entries.pop(tag, None)
+        if len(self.entries) >= self.size:
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[tag] = entry
+        
+    def discard(self, tag):
+        """Forget tag's lookup"""
+        self.entries.pop(tag, None)
         
 # Part 3: VotingSystem Class - Core and Display Methods
 
 class VotingSystem:
     """Main voting system controller class"""
     def __init__(self):
-        # Initialize displays and RFID reader
-        self.main_oled = OLED_1inch3()
-        self.info_oled = SH1107()
-        self.rfid = RDM6300()
+        # Initialize displays (double buffered so rendering and flushing can
+        # overlap) and RFID reader
+        self.main_oled = OLED_1inch3(double_buffer=True)
+        self.info_oled = SH1107(double_buffer=True)
+        # The reader starts looking a judge up as soon as the tag ID is in
+        self.rfid = RDM6300(on_tag_id=self.prefetch_judge)
         
         # Initialize state variables
-        self.mode = MODE_WAITING
+        self.fsm = StateMachine(TRANSITIONS, MODE_WAITING, self, TIMEOUTS)
         self.current_judge_id = None
         self.selected_category = 0
+        self.results_page = 0
+        self.summary_page = 0
         self.selected_team = 0
         self.needs_refresh = True
-        self.temp_votes = {}
+        self.last_refresh = time.ticks_ms()
+        self.flushing = False
+        self.present_pending = False
+        self.dirty_ballots = {}  # tag -> ballot changed since it was last written
+        self.dirty_since = None  # ticks_ms of the oldest unwritten change
+        self.last_input = time.ticks_ms()
+        self.temp_votes = bytearray(BALLOT_TEMPLATE)  # Current judge's ballot
+        self.frame_cache = FrameCache()
+        self.judge_cache = JudgeCache()
+        self.ballots = BallotStore('ballots')
         
-        # Load or initialize voting data with error handling
+        # Votes and completed judges come from the binary snapshot; older
+        # devices kept JSON files, converted here once
+        try:
+            snapshot = VoteSnapshot.load('votes.bin')
+        except OSError:
+            snapshot = self.migrate_json()
+        self.apply_snapshot(snapshot)
+        self.generation = snapshot.generation
+            
+        # Optional member allowlist, queried on flash; without one every fob is accepted
         try:
-            with open('votes.json', 'r') as f:
-                self.votes = json.load(f)
+            self.members = MemberList('members.bin')
+        except (OSError, ValueError) as e:
+            print(f"No member allowlist, accepting all fobs: {e}")
+            self.members = None
+            
+        # The snapshot is the state before the vote log started; replay
+        # every submission made since on top of it
+        self.log = VoteLog('votes.log')
+        self.log.replay(self.apply_log_record, self.generation)
+        
+        # Ballot files hold CATEGORIES and TEAMS indices, so a snapshot
+        # naming them differently (or still holding ballots) is rewritten
+        event_changed = snapshot.categories != CATEGORIES or snapshot.teams != TEAMS
+        if event_changed:
+            self.remap_ballots()
+        compacted = False
+        if self.migrate_ballots() or event_changed:
+            compacted = self.compact()
+        if event_changed and not compacted:
+            # Votes logged now would be replayed against the old snapshot's
+            # categories and teams, so the new event cannot be used yet
+            self.display_error("Can't save votes", "for new event.json")
+            raise OSError("could not write votes.bin for the changed event.json")
+            
+        # Renumbered ballots replace the old ones only once the snapshot
+        # naming the new event is in place, or on the boot after a power cut
+        self.ballots = BallotStore('ballots')
+        self.ballots.replace_with('ballots.new')
+            
+        # Show initial welcome screen
+        self.display_welcome()
+        self.show()
+
+    @property
+    def mode(self):
+        """Current UI state, owned by the state machine"""
+        return self.fsm.state
+
+    def migrate_json(self):
+        """Stream the JSON files older versions kept into a new vote snapshot"""
+        snapshot = VoteSnapshot(CATEGORIES, TEAMS)
+        dropped = 0
+        try:
+            with open('votes.json', 'rb') as f:
+                reader = JSONReader(f)
+                for category in reader.iter_object():
+                    c = EVENT.category_index.get(category, UNVOTED)
+                    for team in reader.iter_object():
+                        count = reader.read_value()
+                        t = EVENT.team_index.get(team, UNVOTED)
+                        if c < len(CATEGORIES) and t < len(TEAMS):
+                            snapshot.tallies[c * len(TEAMS) + t] = count
+                        else:
+                            dropped += count
         except (OSError, ValueError) as e:
             print(f"Initializing new votes file: {e}")
-            self.votes = {category: {} for category in CATEGORIES}
+        if dropped:
+            print(f"Dropping {dropped} votes for unlisted categories or teams")
             
         try:
-            with open('completed_judges.json', 'r') as f:
-                self.completed_judges = json.load(f)
+            with open('completed_judges.json', 'rb') as f:
+                reader = JSONReader(f)
+                for _ in reader.iter_array():
+                    snapshot.completed.append(parse_tag(reader.read_value()))
         except (OSError, ValueError) as e:
             print(f"Initializing new judges file: {e}")
-            self.completed_judges = []
+        snapshot.completed.sort()
             
         try:
-            with open('in_progress_votes.json', 'r') as f:
-                self.in_progress_votes = json.load(f)
+            with open('in_progress_votes.json', 'rb') as f:
+                reader = JSONReader(f)
+                for tag_id in reader.iter_object():
+                    tag = parse_tag(tag_id)
+                    for category in reader.iter_object():
+                        team = reader.read_value()
+                        c = EVENT.category_index.get(category, UNVOTED)
+                        t = EVENT.team_index.get(team, UNVOTED)
+                        if c < len(CATEGORIES) and t < len(TEAMS):
+                            snapshot.add_ballot(tag, c, t)
         except (OSError, ValueError) as e:
             print(f"Initializing new progress file: {e}")
-            self.in_progress_votes = {}
             
-        # Show initial welcome screen
-        self.display_welcome()
+        try:
+            snapshot.save('votes.bin')
+        except OSError as e:
+            print(f"Error saving data: {e}")
+        return snapshot
+
+    def apply_snapshot(self, snapshot):
+        """Set the in-memory voting state from a vote snapshot, matched by name to CATEGORIES and TEAMS"""
+        self.tallies = array('H', bytes(2 * len(CATEGORIES) * len(TEAMS)))
+        # The vote log and ballot files use the snapshot's indices
+        self.category_map = category_map = bytes([EVENT.category_index.get(name, UNVOTED) for name in snapshot.categories])
+        self.team_map = team_map = bytes([EVENT.team_index.get(name, UNVOTED) for name in snapshot.teams])
+        dropped = 0
+        for c, category in enumerate(category_map):
+            for t, team in enumerate(team_map):
+                count = snapshot.tally(c, t)
+                if category < len(CATEGORIES) and team < len(TEAMS):
+                    self.tallies[category * len(TEAMS) + team] = count
+                else:
+                    dropped += count
+        if dropped:
+            print(f"Dropping {dropped} votes for unlisted categories or teams")
+        self.results = RankedResults(self.tallies, len(CATEGORIES), len(TEAMS))
+        self.completed_judges = snapshot.completed
+        # Ballots convert_votes.py to-bin put in the snapshot, for migrate_ballots()
+        self.in_progress_votes = {}
+        for tag, c, t in snapshot.iter_ballots():
+            self.set_ballot_vote(tag, category_map[c], team_map[t])
+
+    def set_ballot_vote(self, tag, category, team):
+        """Set a vote on a ballot being replayed, ignoring unknown indices"""
+        if category >= len(CATEGORIES) or team >= len(TEAMS):
+            return
+        ballot = self.in_progress_votes.get(tag)
+        if ballot is None:
+            ballot = self.in_progress_votes[tag] = bytearray(BALLOT_TEMPLATE)
+        ballot[category] = team
+
+    def apply_log_record(self, kind, tag, category, team):
+        """Replay one vote log record: votes rebuild a ballot, a submit tallies it"""
+        if kind == LOG_SELECT:
+            if category < len(self.category_map) and team < len(self.team_map):
+                self.set_ballot_vote(tag, self.category_map[category], self.team_map[team])
+        else:
+            ballot = self.in_progress_votes.pop(tag, None)
+            if ballot is not None:
+                self.tally(ballot)
+            self.completed_judges.add(tag)
+            # Power may have been lost before the ballot file was removed
+            self.ballots.remove(tag)
+
+    def migrate_ballots(self):
+        """Move ballots from the snapshot or an unfinished log into the ballot store; returns True if any"""
+        if not self.in_progress_votes:
+            return False
+        for tag, ballot in self.in_progress_votes.items():
+            self.ballots.save(tag, ballot)
+        self.in_progress_votes = {}
+        return True
+
+    def remap_ballots(self):
+        """Copy the ballots, renumbered for a changed event.json, into a new store"""
+        category_map = self.category_map
+        team_map = self.team_map
+        remapped = BallotStore('ballots.new')
+        for tag, stored in self.ballots:
+            ballot = bytearray(BALLOT_TEMPLATE)
+            for c, t in enumerate(stored):
+                if c < len(category_map) and t < len(team_map):
+                    category = category_map[c]
+                    if category < len(CATEGORIES) and team_map[t] < len(TEAMS):
+                        ballot[category] = team_map[t]
+            remapped.save(tag, ballot)
+        self.ballots = remapped
 
     def save_data(self):
-        """Save all voting data to files with error handling"""
+        """Write every ballot changed since the last save to the ballot store"""
         try:
-            with open('votes.json', 'w') as f:
-                json.dump(self.votes, f)
-            with open('completed_judges.json', 'w') as f:
-                json.dump(self.completed_judges, f)
-            with open('in_progress_votes.json', 'w') as f:
-                json.dump(self.in_progress_votes, f)
+            for tag, ballot in self.dirty_ballots.items():
+                self.ballots.save(tag, ballot)
         except OSError as e:
             print(f"Error saving data: {e}")
+        self.dirty_ballots.clear()
+        self.dirty_since = None
+
+    def save_due(self, now):
+        """Should persistence_task write the pending ballots now?"""
+        if self.dirty_since is None:
+            return False
+        # Once input has gone quiet, the judge has left, or the deadline passed
+        return (self.mode == MODE_WAITING
+                or time.ticks_diff(now, self.last_input) >= PERSIST_IDLE_MS
+                or time.ticks_diff(now, self.dirty_since) >= PERSIST_DEADLINE_MS)
+
+    def compact(self):
+        """Fold the vote log into a new snapshot and start an empty log; returns whether the snapshot was written"""
+        snapshot = VoteSnapshot(CATEGORIES, TEAMS)
+        snapshot.tallies = self.tallies
+        snapshot.completed = self.completed_judges
+        snapshot.generation = (self.generation + 1) & 0xFF
+        # A power cut before the log is reset leaves a log from the previous
+        # generation, which the next boot discards instead of replaying
+        try:
+            snapshot.save('votes.bin')
+            self.generation = snapshot.generation
+            self.log.reset(self.generation)
+        except OSError as e:
+            print(f"Error compacting vote log: {e}")
+        return self.generation == snapshot.generation
+
+    def lookup_judge(self, tag):
+        """Return (on the allowlist, ballot) for tag, from the judge cache if possible"""
+        entry = self.judge_cache.get(tag)
+        if entry is None:
+            allowed = self.members is None or tag in self.members
+            ballot = self.dirty_ballots.get(tag)
+            if ballot is None:
+                ballot = bytearray(BALLOT_TEMPLATE)
+                if allowed:
+                    self.ballots.load(tag, ballot)
+            entry = (allowed, ballot)
+            self.judge_cache.put(tag, entry)
+        return entry
+
+    def prefetch_judge(self, tag):
+        """Look up a tag the RFID parser has read but not yet checksummed"""
+        if self.mode == MODE_WAITING:
+            try:
+                self.lookup_judge(tag)
+            except OSError as e:
+                print(f"Error prefetching judge: {e}")
 
     def load_in_progress_votes(self):
         """Load in-progress votes for current judge"""
-        if self.current_judge_id in self.in_progress_votes:
-            self.temp_votes = self.in_progress_votes[self.current_judge_id]
-        else:
-            self.temp_votes = {}
+        self.temp_votes = self.lookup_judge(self.current_judge_id)[1]
+        self.frame_cache.clear()
 
-    def save_in_progress_votes(self):
-        """Save current in-progress votes"""
-        if self.current_judge_id:
-            self.in_progress_votes[self.current_judge_id] = self.temp_votes
-            self.save_data()
+    def record_vote(self, category, team):
+        """Record the current judge's vote; persistence_task writes it later"""
+        if self.current_judge_id is None:
+            return
+        self.temp_votes[category] = team
+        self.frame_cache.clear()
+        self.dirty_ballots[self.current_judge_id] = self.temp_votes
+        if self.dirty_since is None:
+            self.dirty_since = time.ticks_ms()
 
-    def get_missing_categories(self):
-        """Return list of categories still needing votes"""
-        return [cat for cat in CATEGORIES if cat not in self.temp_votes]
+    def missing_count(self):
+        """Number of categories the current judge has not voted in yet"""
+        missing = 0
+        for team in self.temp_votes:
+            if team == UNVOTED:
+                missing += 1
+        return missing
 
     def submit_votes(self):
         """Submit all votes and update records"""
-        if not self.current_judge_id:
+        judge = self.current_judge_id
+        if judge is None:
             return
-            
-        # Add votes to main voting record
-        for category, team in self.temp_votes.items():
-            if category not in self.votes:
-                self.votes[category] = {}
-            if team not in self.votes[category]:
-                self.votes[category][team] = 0
-            self.votes[category][team] += 1
-        
-        # Update completed judges and clean up in-progress
-        self.completed_judges.append(self.current_judge_id)
-        if self.current_judge_id in self.in_progress_votes:
-            del self.in_progress_votes[self.current_judge_id]
+        ballot = self.temp_votes
         
-        # Clear temporary votes
-        self.temp_votes = {}
+        # A submission is never deferred: the whole ballot and the submit
+        # record are logged and committed before the thank you screen
+        try:
+            for category in range(len(CATEGORIES)):
+                if ballot[category] != UNVOTED:
+                    self.log.append_select(judge, category, ballot[category])
+            self.log.append_submit(judge)
+            self.log.flush()
+        except OSError as e:
+            print(f"Error logging submission: {e}")
+        self.tally(ballot)
+        self.completed_judges.add(judge)
         
-        # Save all changes
-        self.save_data()
+        # The log now holds the ballot, so its own file can go
+        self.dirty_ballots.pop(judge, None)
+        self.judge_cache.discard(judge)
+        self.ballots.remove(judge)
+        
+        # Clear temporary votes
+        self.temp_votes = bytearray(BALLOT_TEMPLATE)
+        self.frame_cache.clear()
+
+    def tally(self, ballot):
+        """Add a ballot's votes to the tallies and rankings"""
+        for category in range(len(CATEGORIES)):
+            team = ballot[category]
+            if team != UNVOTED:
+                self.results.vote(category, team)
+
+    def render_cached(self, key, draw):
+        """Render the screen for key from the frame cache, or with draw() on a miss"""
+        main_buf = self.main_oled.buffer
+        info_buf = self.info_oled.buffer
+        frames = self.frame_cache.get(key)
+        if frames is None:
+            draw()
+            self.frame_cache.put(key, main_buf, info_buf)
+        else:
+            copy_bytes(main_buf, frames[0], len(main_buf))
+            copy_bytes(info_buf, frames[1], len(info_buf))
+
+    def show(self):
+        """Swap in the rendered screens and send them, blocking until done"""
+        self.info_oled.swap()
+        self.main_oled.swap()
+        self.info_oled.show()
+        self.main_oled.show()
+
+    def present(self):
+        """Swap in the rendered screens and flush them in the background, once any running flush ends"""
+        if self.flushing:
+            self.present_pending = True
+            return
+        self.info_oled.swap()
+        self.main_oled.swap()
+        self.flushing = True
+        asyncio.create_task(self.flush_async())
+
+    async def flush_async(self):
+        """Send the front buffers page by page, picking up deferred swaps"""
+        try:
+            while True:
+                await self.info_oled.show_async()
+                await self.main_oled.show_async()
+                if not self.present_pending:
+                    break
+                self.present_pending = False
+                self.info_oled.swap()
+                self.main_oled.swap()
+        finally:
+            self.flushing = False
 
     def display_welcome(self):
         """Display welcome screen on both displays"""
+        self.render_cached((MODE_WAITING,), self._draw_welcome)
+
+    def _draw_welcome(self):
+        """Draw the welcome screen into both frame buffers"""
         # Small display shows instructions
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         fb.text("Welcome!", 0, 0, 1)
         fb.text("Tap key fob", 0, 20, 1)
         fb.text("to begin", 0, 32, 1)
-        self.info_oled.show()
         
         # Big display shows art and title
         self.main_oled.fill(0)
-        lines = WELCOME_ART.strip().split('\n')
         y = 2
-        for line in lines:
-            self.main_oled.text(line[:21], 0, y, 1)
+        for line in WELCOME_LINES:
+            self.main_oled.text(line, 0, y, 1)
             y += 8
-        self.main_oled.text("PS1 Project Voting", 20, 55, 1)
-        self.main_oled.show()
+        self.main_oled.text(TITLE_LINE, TITLE_X, 55, 1)
+
+    def display_error(self, *lines):
+        """Show an error that stops the kiosk on both displays"""
+        self.info_oled.clear()
+        self.info_oled.framebuf.text("Error", 0, 0, 1)
+        self.main_oled.fill(0)
+        y = 20
+        for line in lines:
+            self.info_oled.framebuf.text(line[:columns(0)], 0, y, 1)
+            self.main_oled.text(line[:columns(0)], 0, y, 1)
+            y += 12
+        self.show()
 
     def display_judge_menu(self):
         """Display judge menu on both displays"""
+        self.render_cached((MODE_JUDGE_MENU, self.current_judge_id), self._draw_judge_menu)
+
+    def _draw_judge_menu(self):
+        """Draw the judge menu screen into both frame buffers"""
         # Small display - ID and instructions
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         fb.text("Judge Menu", 0, 0, 1)
-        fb.text(f"ID: {self.current_judge_id}", 0, 20, 1)
+        fb.text(f"ID: {format_tag(self.current_judge_id)}", 0, 20, 1)
         
         if self.current_judge_id in self.completed_judges:
             fb.text("Already voted!", 0, 40, 1)
         else:
             fb.text("A: Start/Resume", 0, 40, 1)
-        self.info_oled.show()
         
         # Big display - welcome and status
         self.main_oled.fill(0)
@@ -439,363 +907,467 @@ class VotingSystem:
             self.main_oled.text("submitted votes", 10, 35, 1)
             self.main_oled.text("B: View Results", 10, 45, 1)
         else:
-            if self.current_judge_id in self.in_progress_votes:
+            if self.missing_count() < len(CATEGORIES):
                 self.main_oled.text("You have votes", 10, 25, 1)
                 self.main_oled.text("in progress", 10, 35, 1)
             self.main_oled.text("A: Start/Continue", 10, 45, 1)
             self.main_oled.text("B: Exit", 10, 55, 1)
-        self.main_oled.show()
-
-    def update_info_display(self):
-        """Update team info on both displays"""
-        self.info_oled.clear()
-        fb = self.info_oled.framebuf
-        
-        team = TEAMS[self.selected_team]
-        info = TEAM_INFO[team]["small"]
-        
-        # Draw title on small display
-        fb.text(team, 0, 0, 1)
-        fb.text("-" * 16, 0, 10, 1)
-        
-        # Draw info text on small display
-        y = 25
-        for line in info.split('\n'):
-            fb.text(line, 0, y, 1)
-            y += 12
-        
-        self.info_oled.show()
-        
-        # Big display - detailed info
-        self.main_oled.fill(0)
-        big_info = TEAM_INFO[team]["big"]
-        
-        self.main_oled.text(team, 5, 5, 1)
-        self.main_oled.text("-" * 20, 5, 15, 1)
-        
-        y = 25
-        for line in big_info:
-            self.main_oled.text(line, 10, y, 1)
-            y += 12
-        
-        self.main_oled.show()
 
     def display_missing_categories(self):
         """Display missing categories on both screens"""
-        missing = self.get_missing_categories()
-        
+        self.render_cached((MODE_MISSING,), self._draw_missing_categories)
+
+    def _draw_missing_categories(self):
+        """Draw the missing categories screen into both frame buffers"""
         # Update small display
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         fb.text("Missing Votes:", 0, 0, 1)
-        y = 15
-        for cat in missing[:4]:  # Show up to 4 missing categories
-            fb.text(cat[:16], 0, y, 1)
-            y += 12
-        self.info_oled.show()
+        self._draw_missing_list(fb, 0, 15, columns(0))
         
         # Update main display
         self.main_oled.fill(0)
         self.main_oled.text("Missing Categories", 5, 5, 1)
         self.main_oled.text("-" * 20, 5, 15, 1)
-        y = 25
-        for cat in missing:
-            if len(cat) > 21:
-                words = cat.split()
-                self.main_oled.text(" ".join(words[:2]), 5, y, 1)
+        self._draw_missing_list(self.main_oled, 5, 25, columns(5))
+
+    def _draw_missing_list(self, fb, x, y, width):
+        """Draw the wrapped names of missing categories from y down, then "+n more" for any that do not fit"""
+        left = self.missing_count()
+        for i in range(len(CATEGORIES)):
+            if self.temp_votes[i] != UNVOTED:
+                continue
+            lines = CATEGORY_LAYOUT.lines(i, width)
+            # Keep a line free for "+n more" unless this is the last one
+            if y + 10 * (len(lines) - 1 if left == 1 else len(lines)) > LAST_LINE_Y:
+                break
+            for line in lines:
+                fb.text(line, x, y, 1)
                 y += 10
-                self.main_oled.text(" ".join(words[2:]), 5, y, 1)
-            else:
-                self.main_oled.text(cat, 5, y, 1)
-            y += 10
-        self.main_oled.show()
-        
+            left -= 1
+        if left:
+            fb.text(f"+{left} more", x, y, 1)
+
     def display_category_select(self):
         """Display category selection screens"""
+        self.render_cached((MODE_CATEGORY_SELECT, self.selected_category), self._draw_category_select)
+
+    def _draw_category_select(self):
+        """Draw the category selection screen into both frame buffers"""
         # Small display - categories
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         fb.text("Select Category:", 0, 0, 1)
         
-        if self.selected_category < len(CATEGORIES):
-            current = CATEGORIES[self.selected_category]
-        else:
-            current = SUBMIT_OPTION
-        
+        # The SUBMIT option sits at index len(CATEGORIES) in CATEGORY_LAYOUT
         fb.text(">", 0, 20, 1)
-        fb.text(current[:16], 10, 20, 1)
+        fb.text(CATEGORY_LAYOUT.fit(self.selected_category, columns(10)), 10, 20, 1)
+        fb.text(f"{self.selected_category + 1}/{len(CATEGORIES) + 1}", 10, 30, 1)
         
-        if current in self.temp_votes:
-            fb.text(f"Team: {self.temp_votes[current]}", 0, 40, 1)
+        if self.selected_category < len(CATEGORIES):
+            team_index = self.temp_votes[self.selected_category]
+            if team_index != UNVOTED:
+                fb.text("Team: " + TEAM_LAYOUT.fit(team_index, 10), 0, 40, 1)
         fb.text("A:Select B:Back", 0, 55, 1)
-        self.info_oled.show()
         
         # Big display - progress
         self.main_oled.fill(0)
         self.main_oled.text("Category Selection", 5, 5, 1)
         self.main_oled.text("-" * 20, 5, 15, 1)
         
-        voted = len(self.temp_votes)
         total = len(CATEGORIES)
+        voted = total - self.missing_count()
         self.main_oled.text(f"Progress: {voted}/{total}", 10, 25, 1)
         
         # Show category description if applicable
         if self.selected_category < len(CATEGORIES):
-            cat = CATEGORIES[self.selected_category]
-            if len(cat) > 16:
-                words = cat.split()
-                self.main_oled.text(" ".join(words[:2]), 10, 40, 1)
-                self.main_oled.text(" ".join(words[2:]), 10, 50, 1)
+            lines = CATEGORY_LAYOUT.lines(self.selected_category, columns(10))
+            if len(lines) > 1:
+                self.main_oled.text(lines[0], 10, 40, 1)
+                self.main_oled.text(lines[1], 10, 50, 1)
             else:
-                self.main_oled.text(cat, 10, 45, 1)
-        self.main_oled.show()
+                self.main_oled.text(lines[0], 10, 45, 1)
 
     def display_voting_screen(self):
         """Display voting screen for current category"""
+        self.render_cached((MODE_VOTING, self.selected_category, self.selected_team), self._draw_voting_screen)
+
+    def _draw_voting_screen(self):
+        """Draw the voting screen into both frame buffers"""
         # Small display - team selection
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         
-        team = TEAMS[self.selected_team]
-        info = TEAM_INFO[team]["small"]
-        
-        fb.text(team, 0, 0, 1)
+        fb.text(TEAM_LAYOUT.fit(self.selected_team, columns(0)), 0, 0, 1)
         fb.text("-" * 16, 0, 10, 1)
-        fb.text(info.split('\n')[0], 0, 25, 1)
+        y = 22
+        for line in TEAM_BLURBS[self.selected_team]:
+            fb.text(line, 0, y, 1)
+            y += 10
         fb.text("A:Select B:Back", 0, 55, 1)
-        self.info_oled.show()
         
         # Big display - category and team info
         self.main_oled.fill(0)
-        category = CATEGORIES[self.selected_category]
         
         # Display category name
-        if len(category) > 16:
-            words = category.split()
-            self.main_oled.text(words[0], 0, 0, 1)
-            self.main_oled.text(" ".join(words[1:]), 0, 10, 1)
+        lines = CATEGORY_LAYOUT.lines(self.selected_category, columns(0))
+        if len(lines) > 1:
+            self.main_oled.text(lines[0], 0, 0, 1)
+            self.main_oled.text(lines[1], 0, 10, 1)
         else:
-            self.main_oled.text(category, 0, 5, 1)
+            self.main_oled.text(lines[0], 0, 5, 1)
         
         self.main_oled.text("-" * 20, 0, 20, 1)
-        self.main_oled.text("Selected Team:", 0, 30, 1)
-        self.main_oled.text(team, 10, 40, 1)
+        self.main_oled.text(f"Team {self.selected_team + 1}/{len(TEAMS)}:", 0, 30, 1)
+        self.main_oled.text(TEAM_LAYOUT.fit(self.selected_team, columns(10)), 10, 40, 1)
         
         self.main_oled.text("A:Vote  B:Back", 0, 55, 1)
-        self.main_oled.show()
 
     def display_confirm_submit(self):
         """Display vote confirmation screen"""
+        self.render_cached((MODE_CONFIRM_SUBMIT, self.summary_page), self._draw_confirm_submit)
+
+    def _draw_confirm_submit(self):
+        """Draw the vote confirmation screen into both frame buffers"""
         # Small display - confirmation
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         fb.text("Submit Votes?", 0, 0, 1)
         fb.text("A: Yes", 0, 20, 1)
         fb.text("B: No, go back", 0, 35, 1)
-        self.info_oled.show()
+        if SUMMARY_PAGES > 1:
+            fb.text(f"Rotate: {self.summary_page + 1}/{SUMMARY_PAGES}", 0, 50, 1)
         
-        # Big display - summary
+        # Big display - summary, SUMMARY_ROWS categories per page
         self.main_oled.fill(0)
         self.main_oled.text("Vote Summary", 5, 5, 1)
         self.main_oled.text("-" * 20, 5, 15, 1)
         
         y = 25
-        for category in CATEGORIES:
-            if category in self.temp_votes:
-                team = self.temp_votes[category]
-                text = f"{category[:8]}: {team[:8]}"
-                self.main_oled.text(text, 0, y, 1)
+        start = self.summary_page * SUMMARY_ROWS
+        for i in range(start, min(start + SUMMARY_ROWS, len(CATEGORIES))):
+            team_index = self.temp_votes[i]
+            if team_index != UNVOTED:
+                for line in CATEGORY_LAYOUT.lines(i, columns(0)):
+                    self.main_oled.text(line, 0, y, 1)
+                    y += 10
+                self.main_oled.text(TEAM_LAYOUT.fit(team_index, columns(10)), 10, y, 1)
                 y += 10
-        self.main_oled.show()
 
     def display_results(self):
         """Display voting results for current category"""
-        category = CATEGORIES[self.selected_category]
+        self.render_cached((MODE_RESULTS, self.selected_category, self.results_page), self._draw_results)
+
+    def results_rows(self):
+        """Ranking rows that fit under the current category's title"""
+        return 4 if len(CATEGORY_LAYOUT.lines(self.selected_category, columns(0))) == 1 else 3
+
+    def _draw_results(self):
+        """Draw the results screen into both frame buffers"""
+        category = self.selected_category
+        lines = CATEGORY_LAYOUT.lines(category, columns(0))
+        rows = self.results_rows()
+        pages = self.results.pages(rows)
         
         # Small display - navigation
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         fb.text("Results", 0, 0, 1)
-        fb.text(category[:16], 0, 15, 1)
-        if len(category) > 16:
-            fb.text(category[16:], 0, 25, 1)
+        y = 15
+        for line in lines:
+            fb.text(line, 0, y, 1)
+            y += 10
+        if pages > 1:
+            fb.text(f"A: Page {self.results_page + 1}/{pages}", 0, 35, 1)
         fb.text("Rotate: Next", 0, 45, 1)
         fb.text("B: Exit", 0, 55, 1)
-        self.info_oled.show()
         
         # Big display - results
         self.main_oled.fill(0)
-        self.main_oled.text(category[:21], 0, 0, 1)
-        if len(category) > 21:
-            self.main_oled.text(category[21:], 0, 10, 1)
-            y_start = 25
-        else:
-            y_start = 15
+        y = 0
+        for line in lines:
+            self.main_oled.text(line, 0, y, 1)
+            y += 10
+        y_start = 25 if len(lines) > 1 else 15
             
         self.main_oled.text("-" * 20, 0, y_start, 1)
         y = y_start + 10
         
-        if category in self.votes:
-            for team in TEAMS:
-                votes = self.votes[category].get(team, 0)
-                self.main_oled.text(f"{team}: {votes}", 5, y, 1)
-                y += 10
-        
-        self.main_oled.show()
+        # Teams in ranking order; tied teams share a rank
+        for pos in self.results.page(self.results_page, rows):
+            team = self.results.team_at(category, pos)
+            text = "%2d %-8s%5d" % (self.results.rank_at(category, pos), TEAM_LAYOUT.fit(team, 8),
+                                    self.results.votes_at(category, pos))
+            self.main_oled.text(text, 0, y, 1)
+            y += 10
 
     def display_thank_you(self):
         """Display thank you message"""
+        self.render_cached((MODE_THANK_YOU,), self._draw_thank_you)
+
+    def _draw_thank_you(self):
+        """Draw the thank you screen into both frame buffers"""
         # Small display
         self.info_oled.clear()
         fb = self.info_oled.framebuf
         fb.text("Thank you!", 25, 30, 1)
-        self.info_oled.show()
         
         # Big display
         self.main_oled.fill(0)
         self.main_oled.text("Thank you for", 20, 20, 1)
         self.main_oled.text("your votes!", 25, 35, 1)
-        self.main_oled.show()
-        time.sleep(2)
-        self.mode = MODE_WAITING
-        self.needs_refresh = True
 
-def encoder_handler(pin):
-    """Handle rotary encoder rotation"""
-    global voting_system
-    if ENC_A.value():  # Clockwise
-        if voting_system.mode == MODE_CATEGORY_SELECT:
-            max_options = len(CATEGORIES) + 1  # Categories plus SUBMIT option
-            voting_system.selected_category = (voting_system.selected_category + 1) % max_options
-        elif voting_system.mode == MODE_VOTING:
-            voting_system.selected_team = (voting_system.selected_team + 1) % len(TEAMS)
-            voting_system.update_info_display()
-        elif voting_system.mode == MODE_RESULTS:
-            voting_system.selected_category = (voting_system.selected_category + 1) % len(CATEGORIES)
-    else:  # Counter-clockwise
-        if voting_system.mode == MODE_CATEGORY_SELECT:
-            max_options = len(CATEGORIES) + 1
-            voting_system.selected_category = (voting_system.selected_category - 1) % max_options
-        elif voting_system.mode == MODE_VOTING:
-            voting_system.selected_team = (voting_system.selected_team - 1) % len(TEAMS)
-            voting_system.update_info_display()
-        elif voting_system.mode == MODE_RESULTS:
-            voting_system.selected_category = (voting_system.selected_category - 1) % len(CATEGORIES)
-    voting_system.needs_refresh = True
+    def display_rejected(self):
+        """Display that the tapped fob is not allowed to vote"""
+        self.render_cached((MODE_REJECTED,), self._draw_rejected)
 
-# Initialize the voting system
-voting_system = VotingSystem()
+    def _draw_rejected(self):
+        """Draw the unknown fob screen into both frame buffers"""
+        # Small display
+        self.info_oled.clear()
+        fb = self.info_oled.framebuf
+        fb.text("Unknown fob", 20, 30, 1)
+        
+        # Big display
+        self.main_oled.fill(0)
+        self.main_oled.text("Fob not on the", 8, 20, 1)
+        self.main_oled.text("judge list", 24, 35, 1)
+
+# Part 4: State Machine Handlers and Tables
+# Handlers are called as handler(voting_system, arg) and return the next
+# state, or None to stay in the current one.
+
+def on_tag(vs, tag):
+    """A judge tapped their fob"""
+    print(f"Tag read: {format_tag(tag)}")  # For debugging
+    if not vs.lookup_judge(tag)[0]:
+        return MODE_REJECTED
+    vs.current_judge_id = tag
+    vs.load_in_progress_votes()
+    return MODE_JUDGE_MENU
+
+def on_judge_start(vs, arg):
+    """Start or resume voting unless this judge already submitted"""
+    if vs.current_judge_id not in vs.completed_judges:
+        return MODE_CATEGORY_SELECT
+    return None
+
+def on_judge_exit(vs, arg):
+    """Leave the judge menu: completed judges see results, others log out"""
+    if vs.current_judge_id in vs.completed_judges:
+        vs.selected_category = 0  # May still be on the SUBMIT option
+        vs.results_page = 0
+        return MODE_RESULTS
+    return MODE_WAITING
+
+def on_category_rotate(vs, detents):
+    """Move through the categories plus the SUBMIT option"""
+    max_options = len(CATEGORIES) + 1
+    vs.selected_category = (vs.selected_category + detents) % max_options
+    return None
+
+def on_category_chosen(vs, arg):
+    """Vote in the selected category, or submit if every category is done"""
+    if vs.selected_category < len(CATEGORIES):
+        return MODE_VOTING
+    if vs.missing_count():
+        return MODE_MISSING
+    vs.summary_page = 0
+    return MODE_CONFIRM_SUBMIT
+
+def on_category_back(vs, arg):
+    """Return to the judge menu, keeping votes made so far"""
+    return MODE_JUDGE_MENU
+
+def on_team_rotate(vs, detents):
+    """Move through the teams"""
+    vs.selected_team = (vs.selected_team + detents) % len(TEAMS)
+    return None
+
+def on_vote_cast(vs, arg):
+    """Record the selected team for the selected category"""
+    vs.record_vote(vs.selected_category, vs.selected_team)
+    return MODE_CATEGORY_SELECT
+
+def on_summary_rotate(vs, detents):
+    """Page through the vote summary"""
+    vs.summary_page = (vs.summary_page + detents) % SUMMARY_PAGES
+    return None
+
+def on_submit(vs, arg):
+    """Submit the completed ballot"""
+    vs.submit_votes()
+    return MODE_THANK_YOU
+
+def on_results_rotate(vs, detents):
+    """Move through the categories' results"""
+    vs.selected_category = (vs.selected_category + detents) % len(CATEGORIES)
+    vs.results_page = 0
+    return None
+
+def on_results_page(vs, arg):
+    """Show the next page of the category's ranking"""
+    vs.results_page = (vs.results_page + 1) % vs.results.pages(vs.results_rows())
+    return None
+
+# state -> {event: next state or handler}
+TRANSITIONS = {
+    MODE_WAITING: {
+        EV_TAG: on_tag,
+    },
+    MODE_JUDGE_MENU: {
+        EV_KEY_A: on_judge_start,
+        EV_KEY_B: on_judge_exit,
+    },
+    MODE_CATEGORY_SELECT: {
+        EV_ROTATE: on_category_rotate,
+        EV_KEY_A: on_category_chosen,
+        EV_KEY_B: on_category_back,
+    },
+    MODE_VOTING: {
+        EV_ROTATE: on_team_rotate,
+        EV_KEY_A: on_vote_cast,
+        EV_KEY_B: MODE_CATEGORY_SELECT,
+    },
+    MODE_MISSING: {
+        EV_TIMEOUT: MODE_CATEGORY_SELECT,
+    },
+    MODE_CONFIRM_SUBMIT: {
+        EV_ROTATE: on_summary_rotate,
+        EV_KEY_A: on_submit,
+        EV_KEY_B: MODE_CATEGORY_SELECT,
+    },
+    MODE_RESULTS: {
+        EV_ROTATE: on_results_rotate,
+        EV_KEY_A: on_results_page,
+        EV_KEY_B: MODE_WAITING,
+    },
+    MODE_THANK_YOU: {
+        EV_TIMEOUT: MODE_WAITING,
+    },
+    MODE_REJECTED: {
+        EV_TIMEOUT: MODE_WAITING,
+    },
+}
 
-# Set up encoder interrupt
-ENC_B.irq(trigger=Pin.IRQ_FALLING, handler=encoder_handler)
+# state -> ms before EV_TIMEOUT is posted
+TIMEOUTS = {
+    MODE_MISSING: MESSAGE_TIMEOUT,
+    MODE_THANK_YOU: MESSAGE_TIMEOUT,
+    MODE_REJECTED: MESSAGE_TIMEOUT,
+}
+
+# state -> number of items the encoder scrolls through (sets acceleration)
+ROTATE_SPANS = {
+    MODE_CATEGORY_SELECT: len(CATEGORIES) + 1,
+    MODE_VOTING: len(TEAMS),
+    MODE_CONFIRM_SUBMIT: SUMMARY_PAGES,
+    MODE_RESULTS: len(CATEGORIES),
+}
+
+# state -> screen renderer
+SCREENS = {
+    MODE_WAITING: VotingSystem.display_welcome,
+    MODE_JUDGE_MENU: VotingSystem.display_judge_menu,
+    MODE_CATEGORY_SELECT: VotingSystem.display_category_select,
+    MODE_VOTING: VotingSystem.display_voting_screen,
+    MODE_MISSING: VotingSystem.display_missing_categories,
+    MODE_CONFIRM_SUBMIT: VotingSystem.display_confirm_submit,
+    MODE_RESULTS: VotingSystem.display_results,
+    MODE_THANK_YOU: VotingSystem.display_thank_you,
+    MODE_REJECTED: VotingSystem.display_rejected,
+}
+
+# Part 5: Tasks
 
-# Main loop
-last_refresh = time.ticks_ms()
 REFRESH_DELAY = 100  # Minimum ms between refreshes
+INPUT_POLL_MS = 5    # How often queued input is turned into events
+COMPACT_LOG_BYTES = 4096  # Vote log size that triggers a new snapshot
+PERSIST_IDLE_MS = 1000      # Input quiet time after which pending votes are written
+PERSIST_DEADLINE_MS = 5000  # Longest a vote waits to be written during busy input
 
-while True:
-    current_time = time.ticks_ms()
-    
-    # Check for RFID tags in waiting mode
-    if voting_system.mode == MODE_WAITING:
-        tag = voting_system.rfid.read_tag()
-        if tag:
-            print(f"Tag read: {tag}")  # For debugging
-            voting_system.current_judge_id = tag
-            voting_system.mode = MODE_JUDGE_MENU
-            voting_system.load_in_progress_votes()
-            voting_system.needs_refresh = True
-    
-    # Handle button inputs with debounce
-    if time.ticks_diff(current_time, last_refresh) > 50:  # Basic debounce
-        if voting_system.mode == MODE_JUDGE_MENU:
-            if not KEY_A.value() and voting_system.current_judge_id not in voting_system.completed_judges:
-                voting_system.mode = MODE_CATEGORY_SELECT
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-            if not KEY_B.value():
-                if voting_system.current_judge_id in voting_system.completed_judges:
-                    voting_system.mode = MODE_RESULTS
-                else:
-                    voting_system.mode = MODE_WAITING
-                    voting_system.save_in_progress_votes()
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-        elif voting_system.mode == MODE_CATEGORY_SELECT:
-            if not KEY_A.value():
-                if voting_system.selected_category < len(CATEGORIES):
-                    voting_system.mode = MODE_VOTING
-                    voting_system.update_info_display()
-                else:  # SUBMIT option selected
-                    missing = voting_system.get_missing_categories()
-                    if not missing:
-                        voting_system.mode = MODE_CONFIRM_SUBMIT
-                    else:
-                        # Show missing categories temporarily
-                        voting_system.display_missing_categories()
-                        time.sleep(2)
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-            if not KEY_B.value():
-                voting_system.mode = MODE_JUDGE_MENU
-                voting_system.save_in_progress_votes()
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-        elif voting_system.mode == MODE_VOTING:
-            if not KEY_A.value():
-                category = CATEGORIES[voting_system.selected_category]
-                team = TEAMS[voting_system.selected_team]
-                voting_system.temp_votes[category] = team
-                voting_system.mode = MODE_CATEGORY_SELECT
-                voting_system.save_in_progress_votes()
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-            if not KEY_B.value():
-                voting_system.mode = MODE_CATEGORY_SELECT
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-        elif voting_system.mode == MODE_CONFIRM_SUBMIT:
-            if not KEY_A.value():
-                voting_system.submit_votes()
-                voting_system.mode = MODE_THANK_YOU
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-            if not KEY_B.value():
-                voting_system.mode = MODE_CATEGORY_SELECT
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-                
-        elif voting_system.mode == MODE_RESULTS:
-            if not KEY_B.value():
-                voting_system.mode = MODE_WAITING
-                voting_system.needs_refresh = True
-                time.sleep(0.2)
-    
-    # Update display when needed
-    if voting_system.needs_refresh and time.ticks_diff(current_time, last_refresh) > REFRESH_DELAY:
+async def rfid_task():
+    """Poll the RFID reader while waiting for a judge"""
+    while True:
         if voting_system.mode == MODE_WAITING:
-            voting_system.display_welcome()
-        elif voting_system.mode == MODE_JUDGE_MENU:
-            voting_system.display_judge_menu()
-        elif voting_system.mode == MODE_CATEGORY_SELECT:
-            voting_system.display_category_select()
-        elif voting_system.mode == MODE_VOTING:
-            voting_system.display_voting_screen()
-        elif voting_system.mode == MODE_CONFIRM_SUBMIT:
-            voting_system.display_confirm_submit()
-        elif voting_system.mode == MODE_RESULTS:
-            voting_system.display_results()
-        elif voting_system.mode == MODE_THANK_YOU:
-            voting_system.display_thank_you()
+            tag = voting_system.rfid.read_tag()
+            if tag:
+                voting_system.fsm.post(EV_TAG, tag)
+        # Poll faster while a frame is arriving so its tail is picked up promptly
+        await asyncio.sleep_ms(2 if voting_system.rfid.parser.pos else 10)
+
+async def dispatch_task():
+    """Turn queued input into events, run them through the state machine
+    and advance its timers"""
+    fsm = voting_system.fsm
+    last = time.ticks_ms()
+    while True:
+        await asyncio.sleep_ms(INPUT_POLL_MS)
+        now = time.ticks_ms()
+        fsm.tick(time.ticks_diff(now, last))
+        last = now
+        
+        # Buttons are tagged with the event they post when pressed
+        for button in buttons:
+            button.poll()
+        while True:
+            event = button_events.get()
+            if event is None:
+                break
+            if event[1] == BUTTON_PRESS:
+                fsm.post(event[0])
+        
+        # Coalesce every detent since the last tick into one rotate event
+        detents = encoder.read(ROTATE_SPANS.get(fsm.state, 0))
+        if detents:
+            fsm.post(EV_ROTATE, detents)
+        if fsm.run():
+            voting_system.needs_refresh = True
+            voting_system.last_input = now
+
+async def render_task():
+    """Redraw the screen for the current state and hand it to the flusher"""
+    while True:
+        await asyncio.sleep_ms(10)
+        if not voting_system.needs_refresh:
+            continue
+        if time.ticks_diff(time.ticks_ms(), voting_system.last_refresh) <= REFRESH_DELAY:
+            continue
         
+        # Cleared before drawing so changes made meanwhile trigger another pass
         voting_system.needs_refresh = False
-        last_refresh = current_time
-    
-    time.sleep(0.01)  # Small delay to prevent busy waiting
+        SCREENS[voting_system.mode](voting_system)
+        voting_system.present()
+        voting_system.last_refresh = time.ticks_ms()
+
+async def persistence_task():
+    """Write pending votes to flash behind the UI, and compact the log while
+    the kiosk is idle"""
+    while True:
+        await asyncio.sleep_ms(50)
+        if voting_system.save_due(time.ticks_ms()):
+            voting_system.save_data()
+        if voting_system.log.size >= COMPACT_LOG_BYTES and voting_system.mode == MODE_WAITING:
+            voting_system.compact()
+
+async def main():
+    """Run the kiosk as a set of cooperative tasks"""
+    asyncio.create_task(rfid_task())
+    asyncio.create_task(dispatch_task())
+    asyncio.create_task(persistence_task())
+    await render_task()
+
+# Initialize the voting system
+voting_system = VotingSystem()
+
+# Set up the encoder and buttons; their interrupt handlers are allocation-free
+# so they run hard
+micropython.alloc_emergency_exception_buf(100)
+encoder = RotaryEncoder(ENC_A, ENC_B)
+button_events = ButtonEvents()
+buttons = (
+    Button(KEY_A, EV_KEY_A, button_events),
+    Button(KEY_B, EV_KEY_B, button_events),
+)
+
+asyncio.run(main())